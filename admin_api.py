@@ -0,0 +1,173 @@
+"""
+JSON API админ-панели: таблица статей с серверной фильтрацией, сортировкой
+и keyset-пагинацией, а также статистика дашборда одним запросом.
+
+Таблица выбирает только нужные колонки (без content), поэтому страница из
+25 строк стоит одного индексного запроса независимо от числа статей.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from flask import abort, jsonify, request, url_for
+from flask_login import login_required
+from sqlalchemy import and_, case, func, or_, select
+
+from app import app, db
+from models import Article, Category, Tag
+from routes import admin_required
+
+SORT_COLUMNS = {
+    'created_at': Article.created_at,
+    'updated_at': Article.updated_at,
+    'title': Article.title,
+}
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+
+
+def dashboard_stats():
+    """Return article, published, draft, category and tag counts in one query."""
+    row = db.session.execute(
+        select(
+            func.count(Article.id),
+            func.coalesce(
+                func.sum(case((Article.published.is_(True), 1), else_=0)),
+                0),
+            select(func.count(Category.id)).scalar_subquery(),
+            select(func.count(Tag.id)).scalar_subquery(),
+        )).one()
+    articles_count, published_count, categories_count, tags_count = row
+    return {
+        'articles_count': articles_count,
+        'published_count': int(published_count),
+        'draft_count': articles_count - int(published_count),
+        'categories_count': categories_count,
+        'tags_count': tags_count,
+    }
+
+
+def encode_cursor(value, article_id):
+    """Encode a keyset position (sort value, id) as an opaque URL-safe token."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, article_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Decode a token from encode_cursor(); datetimes unless ``sort`` is a text column."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort not in ('title', 'id'):
+            value = datetime.fromisoformat(value)
+        return value, int(article_id)
+    except (ValueError, TypeError):
+        abort(400, description='Invalid cursor')
+
+
+def article_grid(q=None, status=None, category_id=None, sort='created_at',
+                 order='desc', limit=DEFAULT_LIMIT, cursor=None):
+    """Return one keyset page of projected article rows and the next cursor."""
+    column = SORT_COLUMNS[sort]
+    stmt = select(
+        Article.id,
+        Article.title,
+        Article.slug,
+        Article.published,
+        Article.created_at,
+        Article.updated_at,
+        Category.id.label('category_id'),
+        Category.name.label('category_name'),
+        Category.slug.label('category_slug'),
+    ).outerjoin(Category, Article.category_id == Category.id)
+
+    if q:
+        stmt = stmt.where(Article.title.ilike(f'%{q}%'))
+    if status == 'published':
+        stmt = stmt.where(Article.published.is_(True))
+    elif status == 'draft':
+        stmt = stmt.where(Article.published.is_not(True))
+    if category_id == 0:
+        stmt = stmt.where(Article.category_id.is_(None))
+    elif category_id:
+        stmt = stmt.where(Article.category_id == category_id)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if order == 'asc':
+            stmt = stmt.where(
+                or_(column > value, and_(column == value,
+                                         Article.id > last_id)))
+        else:
+            stmt = stmt.where(
+                or_(column < value, and_(column == value,
+                                         Article.id < last_id)))
+
+    if order == 'asc':
+        stmt = stmt.order_by(column.asc(), Article.id.asc())
+    else:
+        stmt = stmt.order_by(column.desc(), Article.id.desc())
+
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort), last.id)
+    return rows, next_cursor
+
+
+def _serialize_row(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'slug': row.slug,
+        'published': bool(row.published),
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+        'category': {
+            'id': row.category_id,
+            'name': row.category_name,
+            'url': url_for('category', slug=row.category_slug),
+        } if row.category_id else None,
+        'urls': {
+            'view': url_for('article', slug=row.slug),
+            'edit': url_for('edit_article', article_id=row.id),
+            'delete': url_for('delete_article', article_id=row.id),
+        },
+    }
+
+
+@app.route('/admin/api/articles')
+@login_required
+@admin_required
+def admin_api_articles():
+    sort = request.args.get('sort', 'created_at')
+    order = request.args.get('order', 'desc')
+    if sort not in SORT_COLUMNS or order not in ('asc', 'desc'):
+        abort(400, description='Unsupported sort')
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1),
+                MAX_LIMIT)
+
+    rows, next_cursor = article_grid(
+        q=request.args.get('q', '').strip() or None,
+        status=request.args.get('status'),
+        category_id=request.args.get('category_id', type=int),
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=request.args.get('cursor'))
+
+    return jsonify(items=[_serialize_row(row) for row in rows],
+                   next_cursor=next_cursor)
+
+
+@app.route('/admin/api/stats')
+@login_required
+@admin_required
+def admin_api_stats():
+    return jsonify(dashboard_stats())
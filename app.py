@@ -5,92 +5,220 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_caching import Cache
 from flask_wtf.csrf import CSRFProtect
-from werkzeug.security import generate_password_hash
 
-logging.basicConfig(level=logging.DEBUG)
+import db_routing
+import limiter
+import metrics
+import sqlite_tuning
+from db_routing import RoutingSession, replica_binds
+from logging_setup import configure_logging
+from templating import SharedBytecodeCache
+
+configure_logging()
 
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "adminpassword"
 ADMIN_EMAIL = "admin@example.com"
 
-logging.info(f"Default admin credentials: {ADMIN_USERNAME} / {ADMIN_PASSWORD}")
-
 # Инициализация расширений
-db = SQLAlchemy()
-cache = Cache()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+# Кэш страниц целиком; тег {% cache %} в шаблонах использует fragment_cache,
+# чтобы фрагменты переживали cache.clear() после правки статьи
+cache = Cache(with_jinja2_ext=False)
+fragment_cache = Cache(config={"CACHE_DEFAULT_TIMEOUT": 3600})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL",
-                                                       "sqlite:///blog.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_size": 10,
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-app.config["CACHE_TYPE"] = "SimpleCache"
-app.config["CACHE_DEFAULT_TIMEOUT"] = 300
-
-# Инициализация расширений
-db.init_app(app)
-cache.init_app(app)
-login_manager.init_app(app)
-login_manager.login_view = 'login'
-csrf.init_app(app)  # CSRF включён обратно
+def create_app():
+    """Собирает приложение без обращений к БД.
+
+    Импорт модуля не выполняет ввод-вывод: схема и администратор создаются
+    явными командами CLI (см. cli.py), а соединение с БД открывается при
+    первом запросе.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
+
+    database_uri = os.environ.get("DATABASE_URL", "sqlite:///blog.db")
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    if sqlite_tuning.is_file_database(database_uri):
+        # Однохостовый SQLite: WAL и прагмы на соединение (см. sqlite_tuning.py)
+        app.config["SQLITE_PRAGMAS"] = sqlite_tuning.pragmas(
+            busy_timeout=os.environ.get("SQLITE_BUSY_TIMEOUT"),
+            synchronous=os.environ.get("SQLITE_SYNCHRONOUS"),
+            cache_size=os.environ.get("SQLITE_CACHE_SIZE"),
+            mmap_size=os.environ.get("SQLITE_MMAP_SIZE"))
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_tuning.engine_options()
+    else:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            "pool_size": 10,
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+        }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Реплики только для чтения публичных страниц (см. db_routing.py)
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(
+        os.environ.get("DATABASE_REPLICA_URLS", ""))
+    app.config["REPLICA_MAX_LAG"] = float(
+        os.environ.get("REPLICA_MAX_LAG", 5))
+
+    # Как часто воркер сбрасывает счётчики просмотров (см. page_views.py)
+    app.config["VIEW_FLUSH_INTERVAL"] = float(
+        os.environ.get("VIEW_FLUSH_INTERVAL", 30))
+
+    # Прогрев кэша страниц после записи и старта воркера (см. cache_warmer.py)
+    app.config["CACHE_WARM_ENABLED"] = os.environ.get(
+        "CACHE_WARM_ENABLED", "1") not in ("0", "false", "no")
+    app.config["CACHE_WARM_LIMIT"] = int(os.environ.get("CACHE_WARM_LIMIT", 50))
+    app.config["CACHE_WARM_WORKERS"] = int(
+        os.environ.get("CACHE_WARM_WORKERS", 4))
+    app.config["CACHE_WARM_RATE"] = float(os.environ.get("CACHE_WARM_RATE", 10))
+
+    # Сколько прокси стоит перед приложением (см. limiter.py): при 0 адрес
+    # клиента — remote_addr; ненулевое значение без прокси позволяет
+    # клиенту подделать X-Forwarded-For и выбрать себе бакет, поэтому
+    # по умолчанию 0, а 1 задают запуск за прокси (start_server.sh, .replit)
+    app.config["RATE_LIMIT_PROXY_COUNT"] = int(
+        os.environ.get("RATE_LIMIT_PROXY_COUNT", 0))
+    # Общий для воркеров файл бакетов; у каждого экземпляра (и у тестов)
+    # должен быть свой
+    app.config["RATE_LIMIT_SHM_PATH"] = os.environ.get(
+        "RATE_LIMIT_SHM_PATH",
+        os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else
+                     app.instance_path, f"blog-limiter-{os.getuid()}"))
+
+    # Фильтр Блума существующих slug: 404 без запроса к БД (см. slug_filter.py)
+    app.config["SLUG_FILTER_ENABLED"] = os.environ.get(
+        "SLUG_FILTER_ENABLED", "1") not in ("0", "false", "no")
+    app.config["SLUG_FILTER_FP_RATE"] = float(
+        os.environ.get("SLUG_FILTER_FP_RATE", 0.01))
+    app.config["SLUG_FILTER_DIR"] = os.environ.get(
+        "SLUG_FILTER_DIR", os.path.join(app.instance_path, "slug_filter"))
+
+    # Персональные фрагменты кэшированных страниц через ESI, если прокси
+    # его поддерживает (см. hole_punch.py)
+    app.config["HOLE_PUNCH_ESI"] = os.environ.get(
+        "HOLE_PUNCH_ESI", "0") not in ("0", "false", "no")
+
+    # Профилирование запросов по токену или выборке (см. profiler.py)
+    app.config["PROFILE_DIR"] = os.environ.get(
+        "PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+    app.config["PROFILE_SAMPLE_RATE"] = int(
+        os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    app.config["PROFILE_INTERVAL"] = float(
+        os.environ.get("PROFILE_INTERVAL", 0.001))
+    app.config["PROFILE_KEEP"] = int(os.environ.get("PROFILE_KEEP", 100))
+    app.config["PROFILE_TOKEN_MAX_AGE"] = 3600
+
+    # Read model опубликованного контента в памяти (см. read_model.py)
+    app.config["READ_MODEL_ENABLED"] = os.environ.get(
+        "READ_MODEL_ENABLED", "0") not in ("0", "false", "no")
+
+    # Кэши в памяти воркера ограничены по байтам, а не по числу записей
+    # (см. byte_cache.py); фрагменты получают свой бюджет
+    app.config["CACHE_TYPE"] = "byte_cache.ByteLRUCache"
+    app.config["CACHE_DEFAULT_TIMEOUT"] = 300
+    app.config["CACHE_MAX_BYTES"] = int(
+        os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    app.config["CACHE_EVICTION_POLICY"] = os.environ.get(
+        "CACHE_EVICTION_POLICY", "lru")
+    # Варианты строки запроса на путь в кэше страниц (см. page_cache.py)
+    app.config["CACHE_MAX_VARIANTS_PER_PATH"] = int(
+        os.environ.get("CACHE_MAX_VARIANTS_PER_PATH", 50))
+    app.config["CACHE_MAX_SEARCH_VARIANTS"] = int(
+        os.environ.get("CACHE_MAX_SEARCH_VARIANTS", 500))
+    app.config["FRAGMENT_CACHE_MAX_BYTES"] = int(
+        os.environ.get("FRAGMENT_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+    # Версии зависимостей фрагментов: общие для воркеров файлы-штампы
+    app.config["CONTENT_VERSION_DIR"] = os.environ.get(
+        "CONTENT_VERSION_DIR",
+        os.path.join(app.instance_path, "content_versions"))
+
+    # Байткод шаблонов переживает перезапуск воркеров (max_requests, --reload)
+    app.config["TEMPLATE_BYTECODE_DIR"] = os.environ.get(
+        "TEMPLATE_BYTECODE_DIR",
+        os.path.join(app.instance_path, "jinja_bytecode"))
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache":
+        SharedBytecodeCache(app.config["TEMPLATE_BYTECODE_DIR"]),
+    }
+
+    # Инициализация расширений
+    db.init_app(app)
+    sqlite_tuning.init_app(app, db)
+    cache.init_app(app)
+    fragment_cache.init_app(
+        app, {"CACHE_MAX_BYTES": app.config["FRAGMENT_CACHE_MAX_BYTES"]})
+    login_manager.init_app(app)
+    login_manager.login_view = 'login'
+    csrf.init_app(app)  # CSRF включён обратно
+    db_routing.init_app(app)
+    limiter.init_app(app)
+
+    from versions import version_key
+    app.jinja_env.globals['content_version'] = version_key
+
+    app.teardown_appcontext(shutdown_session)
+    app.after_request(after_request)
+
+    from cli import register_commands
+    register_commands(app)
+
+    return app
 
 
-@app.teardown_appcontext
 def shutdown_session(exception=None):
     if exception:
         db.session.rollback()
     db.session.remove()
 
 
-@app.after_request
 def after_request(response):
+    # Коммит только если запрос записал и сам не закоммитил. Чтение (в том
+    # числе ответы из кэша, не открывавшие транзакцию) обходится без COMMIT;
+    # сессию закрывает shutdown_session в teardown_appcontext.
+    metrics.incr('requests.total')
+    if db_routing.is_read_only():
+        metrics.incr('requests.read_only')
+    session = db.session()
     try:
-        db.session.commit()
+        if (session.new or session.dirty or session.deleted
+                or session.info.get('wrote')):
+            session.commit()
+            metrics.incr('db.commits')
+        elif session.in_transaction():
+            metrics.incr('db.commits_skipped')
+        else:
+            metrics.incr('db.sessions_untouched')
     except Exception as e:
-        db.session.rollback()
+        session.rollback()
         logging.error("Database commit error: %s", e)
-    finally:
-        db.session.remove()
     return response
 
 
-with app.app_context():
-    try:
-        import models
-        import routes
-        db.create_all()
-
-        from models import User
-        admin = User.query.filter_by(username=ADMIN_USERNAME).first()
-        if not admin:
-            admin_user = User(
-                username=ADMIN_USERNAME,
-                email=ADMIN_EMAIL,
-                password_hash=generate_password_hash(ADMIN_PASSWORD),
-                is_admin=True)
-            db.session.add(admin_user)
-            db.session.commit()
-            logging.info(
-                f"Admin user '{ADMIN_USERNAME}' created successfully.")
-    except Exception as e:
-        db.session.rollback()
-        logging.error("Error during application initialization: %s", e)
-
-
 @login_manager.user_loader
 def load_user(user_id):
     from models import User
     return User.query.get(int(user_id))
 
 
+app = create_app()
+
+# Модели и маршруты регистрируются на уже созданном app (циклический импорт
+# `from app import app` внутри них безопасен, так как app уже определён).
+import models  # noqa: E402,F401
+import routes  # noqa: E402,F401
+import admin_api  # noqa: E402,F401
+import content_api  # noqa: E402,F401
+import feeds  # noqa: E402,F401
+import suggest  # noqa: E402,F401
+import page_views  # noqa: E402,F401
+import profiler  # noqa: E402,F401
+import slug_filter  # noqa: E402,F401
+import hole_punch  # noqa: E402,F401
+
 if __name__ == "__main__":
     app.run(debug=True)
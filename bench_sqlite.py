@@ -0,0 +1,198 @@
+"""
+Бенчмарк SQLite под конкурентной нагрузкой: прежняя конфигурация против
+профиля из sqlite_tuning.py.
+
+Для каждого профиля создаётся свежий файл БД со статьями, затем на
+``--seconds`` секунд запускаются ``--readers`` процессов-читателей (как
+воркеры Gunicorn, отдающие главную: список статей и их число) и
+``--writers`` процессов-писателей (правка статьи и счётчик просмотров
+в одной транзакции). Печатаются:
+
+    reads/s     суммарная пропускная способность читателей
+    p50, p99    латентность чтения, мс
+    writes/s    завершённые транзакции записи
+    locked      ошибки "database is locked" (чтение и запись)
+
+Профили:
+
+    baseline    journal_mode=DELETE, пул pool_size=10 + pool_pre_ping
+    tuned       WAL, synchronous=NORMAL, mmap, cache_size, busy_timeout
+
+Запуск:
+
+    python bench_sqlite.py
+    python bench_sqlite.py --readers 8 --writers 2 --seconds 10
+    python bench_sqlite.py --json > bench_sqlite.txt
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import sqlite_tuning
+
+READ_QUERIES = (
+    text("SELECT id, title, slug, summary, created_at FROM article "
+         "WHERE published = 1 ORDER BY created_at DESC LIMIT 5 OFFSET :offset"),
+    text("SELECT count(*) FROM article WHERE published = 1"),
+)
+WRITE_QUERIES = (
+    text("UPDATE article SET updated_at = :now, title = title WHERE id = :id"),
+    text("INSERT INTO article_stats (article_id, views) VALUES (:id, 1) "
+         "ON CONFLICT (article_id) DO UPDATE SET views = views + 1"),
+)
+
+
+def create_database(path, articles):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE article (
+            id INTEGER PRIMARY KEY, title VARCHAR(120), slug VARCHAR(140),
+            content TEXT, summary TEXT, created_at DATETIME,
+            updated_at DATETIME, published BOOLEAN);
+        CREATE INDEX ix_article_created_at ON article (created_at);
+        CREATE TABLE article_stats (
+            article_id INTEGER PRIMARY KEY, views BIGINT NOT NULL);
+    """)
+    conn.executemany(
+        "INSERT INTO article VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((i, f'Article {i}', f'article-{i}', 'Lorem ipsum ' * 300,
+          f'Summary {i}', f'2024-01-01 00:{i % 60:02d}:{i % 60:02d}',
+          None, i % 4 != 0) for i in range(1, articles + 1)))
+    conn.commit()
+    conn.close()
+
+
+def make_engine(profile, path):
+    url = f'sqlite:///{path}'
+    if profile == 'baseline':
+        return create_engine(url,
+                             pool_size=10,
+                             pool_recycle=300,
+                             pool_pre_ping=True)
+    engine = create_engine(url, **sqlite_tuning.engine_options())
+    sqlite_tuning.configure_engine(engine, sqlite_tuning.pragmas())
+    return engine
+
+
+def reader(profile, path, deadline, results):
+    engine = make_engine(profile, path)
+    latencies, locked, i = [], 0, 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(READ_QUERIES[0], {'offset': (i % 20) * 5}).all()
+                conn.execute(READ_QUERIES[1]).scalar()
+        except OperationalError:
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        i += 1
+    results.put(('read', latencies, locked))
+
+
+def writer(profile, path, deadline, articles, results):
+    engine = make_engine(profile, path)
+    commits, locked, i = 0, 0, 0
+    while time.time() < deadline:
+        i += 1
+        try:
+            with engine.begin() as conn:
+                params = {'id': i % articles + 1, 'now': time.time()}
+                for query in WRITE_QUERIES:
+                    conn.execute(query, params)
+            commits += 1
+        except OperationalError:
+            locked += 1
+        # Правки реже чтений: пауза между транзакциями
+        time.sleep(0.005)
+    results.put(('write', commits, locked))
+
+
+def run_profile(profile, args, workdir):
+    path = os.path.join(workdir, f'{profile}.db')
+    shutil.copy(os.path.join(workdir, 'template.db'), path)
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    # Общий старт после запуска всех процессов
+    deadline = time.time() + 0.5 + args.seconds
+    procs = [
+        ctx.Process(target=reader, args=(profile, path, deadline, results))
+        for _ in range(args.readers)
+    ] + [
+        ctx.Process(target=writer,
+                    args=(profile, path, deadline, args.articles, results))
+        for _ in range(args.writers)
+    ]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    latencies = sorted(l for kind, ls, _ in collected if kind == 'read'
+                       for l in ls)
+    commits = sum(c for kind, c, _ in collected if kind == 'write')
+    locked = sum(n for _, _, n in collected)
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        'profile': profile,
+        'reads_per_s': round(len(latencies) / args.seconds, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3)
+        if latencies else 0.0,
+        'p99_ms': round(percentile(0.99) * 1000, 3),
+        'writes_per_s': round(commits / args.seconds, 1),
+        'locked': locked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--profiles', default='baseline,tuned')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-sqlite-')
+    try:
+        create_database(os.path.join(workdir, 'template.db'), args.articles)
+        rows = [
+            run_profile(profile.strip(), args, workdir)
+            for profile in args.profiles.split(',')
+        ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.readers} readers, {args.writers} writers, "
+          f"{args.seconds:g}s, {args.articles} articles")
+    print(f"{'profile':<10} {'reads/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'writes/s':>9} {'locked':>7}")
+    for row in rows:
+        print(f"{row['profile']:<10} {row['reads_per_s']:>10} "
+              f"{row['p50_ms']:>8} {row['p99_ms']:>8} "
+              f"{row['writes_per_s']:>9} {row['locked']:>7}")
+
+
+if __name__ == '__main__':
+    main()
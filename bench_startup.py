@@ -0,0 +1,105 @@
+"""
+Бенчмарк холодного старта воркера.
+
+Каждый прогон запускается в отдельном интерпретаторе, как новый воркер
+Gunicorn без --preload (или после перезапуска по max_requests), и измеряет:
+
+    import      время `import main`
+    first       латентность первого запроса
+    steady      медиана следующих запросов к тому же URL
+    ttfr        time-to-first-request: import + first
+
+Запуск:
+
+    python bench_startup.py                 # 10 прогонов, GET /
+    python bench_startup.py -n 20 --path /tag/python
+    python bench_startup.py --json > bench_output.txt
+
+Перед замером БД должна быть инициализирована (`flask --app main bootstrap`).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_WORKER = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from main import app
+t1 = time.perf_counter()
+client = app.test_client()
+path = sys.argv[1]
+t2 = time.perf_counter()
+status = client.get(path).status_code
+t3 = time.perf_counter()
+steady = []
+for _ in range(int(sys.argv[2])):
+    s = time.perf_counter()
+    client.get(path)
+    steady.append(time.perf_counter() - s)
+steady.sort()
+print(json.dumps({
+    "import": t1 - t0,
+    "first": t3 - t2,
+    "steady": steady[len(steady) // 2] if steady else 0.0,
+    "status": status,
+}))
+"""
+
+
+def run_once(path, steady_requests):
+    out = subprocess.run(
+        [sys.executable, '-c', _WORKER, path, str(steady_requests)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    # Последняя строка stdout — результат; выше может быть вывод логирования
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 2),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))] * 1000, 2),
+        'max_ms': round(samples[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--steady', type=int, default=20,
+                        help='requests after the first one, per run')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    runs = [run_once(args.path, args.steady) for _ in range(args.runs)]
+    statuses = sorted({r['status'] for r in runs})
+    report = {
+        'path': args.path,
+        'runs': args.runs,
+        'status': statuses,
+        'import': summarize([r['import'] for r in runs]),
+        'first': summarize([r['first'] for r in runs]),
+        'steady': summarize([r['steady'] for r in runs]),
+        'ttfr': summarize([r['import'] + r['first'] for r in runs]),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.runs} cold workers, GET {args.path} -> {statuses}")
+    for phase in ('import', 'first', 'steady', 'ttfr'):
+        s = report[phase]
+        print(f"  {phase:<7} median {s['median_ms']:>8.2f} ms   "
+              f"p95 {s['p95_ms']:>8.2f} ms   max {s['max_ms']:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
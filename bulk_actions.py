@@ -0,0 +1,113 @@
+"""
+Массовые операции над статьями и тегами для админ-панели.
+
+Каждая функция выполняет одно set-based SQL-выражение на изменение и не
+делает commit: маршрут фиксирует всю пачку одной транзакцией и затем один
+раз сбрасывает кэш и пересобирает sitemap. Счётчики тегов (tag_stats)
+поправляются дельтой по затронутым статьям в той же транзакции.
+"""
+
+from sqlalchemy import delete, exists, insert, literal, select, update
+
+from app import db
+from models import Article, ArticleRevision, ArticleStats, Tag, article_tags
+import tag_stats
+
+
+def publish(article_ids):
+    """Publish every article in ``article_ids``."""
+    return _set_published(article_ids, True)
+
+
+def unpublish(article_ids):
+    """Move every article in ``article_ids`` back to drafts."""
+    return _set_published(article_ids, False)
+
+
+def _set_published(article_ids, published):
+    before = tag_stats.snapshot(article_ids)
+    result = db.session.execute(
+        update(Article).where(Article.id.in_(article_ids)).values(
+            published=published).execution_options(
+                synchronize_session=False))
+    tag_stats.update(before, article_ids)
+    return result.rowcount
+
+
+def delete_articles(article_ids):
+    """Delete the articles with their tag links, view counters and revisions."""
+    before = tag_stats.snapshot(article_ids)
+    db.session.execute(
+        delete(article_tags).where(
+            article_tags.c.article_id.in_(article_ids)))
+    for model in (ArticleStats, ArticleRevision):
+        db.session.execute(
+            delete(model).where(
+                model.article_id.in_(article_ids)).execution_options(
+                    synchronize_session=False))
+    result = db.session.execute(
+        delete(Article).where(Article.id.in_(article_ids)).execution_options(
+            synchronize_session=False))
+    tag_stats.update(before, article_ids)
+    return result.rowcount
+
+
+def recategorize(article_ids, category_id):
+    """Move the articles into ``category_id`` (``None`` clears the category)."""
+    before = tag_stats.snapshot(article_ids)
+    result = db.session.execute(
+        update(Article).where(Article.id.in_(article_ids)).values(
+            category_id=category_id).execution_options(
+                synchronize_session=False))
+    tag_stats.update(before, article_ids)
+    return result.rowcount
+
+
+def add_tag(article_ids, tag_id):
+    """Attach ``tag_id`` to every article that does not have it yet."""
+    before = tag_stats.snapshot(article_ids)
+    already_tagged = exists().where(article_tags.c.article_id == Article.id,
+                                    article_tags.c.tag_id == tag_id)
+    rows = select(Article.id, literal(tag_id)).where(
+        Article.id.in_(article_ids), ~already_tagged)
+    result = db.session.execute(
+        insert(article_tags).from_select(['article_id', 'tag_id'], rows))
+    tag_stats.update(before, article_ids)
+    return result.rowcount
+
+
+def remove_tag(article_ids, tag_id):
+    """Detach ``tag_id`` from the articles."""
+    before = tag_stats.snapshot(article_ids)
+    result = db.session.execute(
+        delete(article_tags).where(article_tags.c.tag_id == tag_id,
+                                   article_tags.c.article_id.in_(article_ids)))
+    tag_stats.update(before, article_ids)
+    return result.rowcount
+
+
+def merge_tags(source_tag_ids, target_tag_id):
+    """Re-point all links of ``source_tag_ids`` to ``target_tag_id`` and drop the sources."""
+    source_tag_ids = [t for t in source_tag_ids if t != target_tag_id]
+    if not source_tag_ids:
+        return 0
+
+    affected = db.session.scalars(
+        select(article_tags.c.article_id).where(
+            article_tags.c.tag_id.in_(source_tag_ids)).distinct()).all()
+    before = tag_stats.snapshot(affected)
+
+    target_links = select(article_tags.c.article_id).where(
+        article_tags.c.tag_id == target_tag_id)
+    rows = select(article_tags.c.article_id, literal(target_tag_id)).where(
+        article_tags.c.tag_id.in_(source_tag_ids),
+        article_tags.c.article_id.not_in(target_links)).distinct()
+    db.session.execute(
+        insert(article_tags).from_select(['article_id', 'tag_id'], rows))
+    db.session.execute(
+        delete(article_tags).where(article_tags.c.tag_id.in_(source_tag_ids)))
+    result = db.session.execute(
+        delete(Tag).where(Tag.id.in_(source_tag_ids)).execution_options(
+            synchronize_session=False))
+    tag_stats.update(before, affected)
+    return result.rowcount
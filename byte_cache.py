@@ -0,0 +1,207 @@
+"""
+Кэш в памяти процесса с ограничением по байтам (CACHE_TYPE для Flask-Caching).
+
+SimpleCache ограничивает число записей (threshold), а не их размер: длинная
+статья весит столько же, сколько страница тега, и память воркера растёт
+непредсказуемо. ByteLRUCache хранит значения сериализованными (как и
+SimpleCache) и учитывает их размер вместе с ключом и накладными расходами
+записи. Пока сумма больше CACHE_MAX_BYTES, записи вытесняются:
+
+* ``lru`` — самая давно не читавшаяся;
+* ``size`` — самая крупная из CACHE_EVICTION_SAMPLE давно не читавшихся,
+  то есть одна большая страница уходит раньше нескольких маленьких.
+
+Значение больше CACHE_MAX_ENTRY_BYTES не кэшируется вовсе. ``stats()``
+возвращает занятые байты, число записей, попадания, вытеснения и самые
+крупные ключи; /admin/metrics показывает их для обоих кэшей.
+"""
+
+import heapq
+import threading
+from collections import OrderedDict
+from time import time
+
+from cachelib.serializers import SimpleSerializer
+from flask_caching.backends.base import BaseCache
+
+# Примерная цена записи сверх ключа и значения: кортеж, узел OrderedDict,
+# объекты bytes и str
+ENTRY_OVERHEAD = 200
+POLICIES = ('lru', 'size')
+
+
+class ByteLRUCache(BaseCache):
+    """Thread-safe in-process cache bounded by the total size of its entries."""
+
+    serializer = SimpleSerializer()
+
+    def __init__(self,
+                 max_bytes=64 * 1024 * 1024,
+                 max_entry_bytes=None,
+                 policy='lru',
+                 sample=8,
+                 default_timeout=300,
+                 ignore_delete_many_errors=True):
+        super().__init__(default_timeout=default_timeout,
+                         ignore_delete_many_errors=ignore_delete_many_errors)
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy!r}")
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.policy = policy
+        self.sample = max(1, sample)
+        # key -> (expires, payload, size); порядок — от давно не читавшихся
+        self._cache = OrderedDict()
+        # (expires, key) по возрастанию срока; устаревшие элементы (ключ
+        # перезаписан или удалён) пропускаются при извлечении
+        self._expiry = []
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._hits = self._misses = 0
+        self._evictions = self._expirations = self._rejected = 0
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            max_bytes=config['CACHE_MAX_BYTES'],
+            max_entry_bytes=config.get('CACHE_MAX_ENTRY_BYTES'),
+            policy=config.get('CACHE_EVICTION_POLICY', 'lru'),
+            sample=config.get('CACHE_EVICTION_SAMPLE', 8),
+        )
+        return cls(*args, **kwargs)
+
+    def _normalize_timeout(self, timeout):
+        timeout = super()._normalize_timeout(timeout)
+        return time() + timeout if timeout > 0 else 0
+
+    def _pop(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+        return entry
+
+    def _live(self, key, now):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] and entry[0] <= now:
+            self._pop(key)
+            self._expirations += 1
+            return None
+        return entry
+
+    def _victim(self):
+        if self.policy == 'lru' or self.sample == 1:
+            return next(iter(self._cache))
+        oldest = []
+        for key, entry in self._cache.items():
+            oldest.append((entry[2], key))
+            if len(oldest) == self.sample:
+                break
+        return max(oldest)[1]
+
+    def _expire(self, now):
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires, key = heapq.heappop(expiry)
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == expires:
+                self._pop(key)
+                self._expirations += 1
+
+    def _evict(self, needed):
+        # Сначала бесплатно освобождаем истёкшее: куча отдаёт только его,
+        # без обхода всего кэша
+        if self._bytes + needed > self.max_bytes:
+            self._expire(time())
+        while self._cache and self._bytes + needed > self.max_bytes:
+            self._pop(self._victim())
+            self._evictions += 1
+
+    def _store(self, key, value, timeout):
+        payload = self.serializer.dumps(value)
+        size = len(payload) + len(key) + ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            self._pop(key)
+            self._rejected += 1
+            return False
+        expires = self._normalize_timeout(timeout)
+        self._pop(key)
+        self._evict(size)
+        self._cache[key] = (expires, payload, size)
+        self._bytes += size
+        if expires:
+            heapq.heappush(self._expiry, (expires, key))
+            # Перезаписи и вытеснения оставляют в куче мусор; пересобираем,
+            # когда его становится больше, чем живых записей
+            if len(self._expiry) > 2 * len(self._cache) + 64:
+                self._expiry = [(e[0], k) for k, e in self._cache.items()
+                                if e[0]]
+                heapq.heapify(self._expiry)
+        return True
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time())
+            if entry is None:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._hits += 1
+            payload = entry[1]
+        return self.serializer.loads(payload)
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            return self._store(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._live(key, time()) is not None:
+                return False
+            return self._store(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._pop(key) is not None
+
+    def has(self, key):
+        with self._lock:
+            return self._live(key, time()) is not None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expiry = []
+            self._bytes = 0
+            return True
+
+    def inc(self, key, delta=1):
+        with self._lock:
+            return super().inc(key, delta)
+
+    def dec(self, key, delta=1):
+        with self._lock:
+            return super().dec(key, delta)
+
+    def stats(self, largest=10):
+        """Return memory usage and counters, with the ``largest`` biggest keys."""
+        with self._lock:
+            top = heapq.nlargest(largest,
+                                 ((entry[2], key)
+                                  for key, entry in self._cache.items()))
+            return {
+                'policy': self.policy,
+                'max_bytes': self.max_bytes,
+                'resident_bytes': self._bytes,
+                'entries': len(self._cache),
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'rejected': self._rejected,
+                'largest': [{
+                    'key': key,
+                    'bytes': size
+                } for size, key in top],
+            }
@@ -0,0 +1,206 @@
+"""
+Прогрев кэша страниц после записи, деплоя и перезапуска воркера.
+
+Список адресов берётся из static/sitemap.xml по убыванию priority (если
+sitemap ещё нет — из базы: главная, категории, теги, свежие статьи). Адреса
+запрашиваются пулом из CACHE_WARM_WORKERS потоков не чаще CACHE_WARM_RATE
+запросов в секунду.
+
+Кэш страниц (SimpleCache) у каждого воркера свой, поэтому есть два режима:
+
+* в процессе (``warm_in_background``): запросы идут через test_client
+  этого же воркера и наполняют именно его кэш. Так прогреваются воркер,
+  выполнивший запись (после invalidate_content), и каждый новый воркер
+  (gunicorn post_worker_init);
+* по HTTP (``flask warm-cache``): запросы к SITE_URL после деплоя
+  распределяются балансировщиком по всем воркерам.
+
+Запросы прогрева помечаются заголовком X-Cache-Warm и не считаются
+просмотрами статей.
+
+Прогретые страницы получают реальные посетители, а шаблоны строят
+canonical, og:url и JSON-LD из адреса запроса. Поэтому запросы в процессе
+идут на SITE_URL, а без него — на адрес запроса, вызвавшего прогрев. Если
+адреса нет (старт воркера без SITE_URL), прогрев пропускается, чтобы в кэш
+не попали ссылки на localhost.
+"""
+
+import logging
+import os
+import threading
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from flask import has_request_context, request
+from sqlalchemy import select
+
+from app import app, db
+from models import Article, Category, Tag
+
+logger = logging.getLogger(__name__)
+
+WARM_HEADER = 'X-Cache-Warm'
+_SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def sitemap_paths(limit=None, path=None):
+    """Return URL paths from the sitemap, highest priority first."""
+    path = path or os.path.join(app.static_folder, 'sitemap.xml')
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError) as e:
+        logger.info("Sitemap unavailable for warming: %s", e)
+        return []
+    entries = []
+    for url in root.iter(f'{_SITEMAP_NS}url'):
+        loc = url.findtext(f'{_SITEMAP_NS}loc')
+        if not loc:
+            continue
+        priority = float(url.findtext(f'{_SITEMAP_NS}priority') or 0.5)
+        entries.append((-priority, len(entries), urlsplit(loc).path or '/'))
+    entries.sort()
+    return [path for _, _, path in entries[:limit]]
+
+
+def database_paths(limit=None):
+    """Fallback list of paths read straight from the database."""
+    with app.app_context():
+        paths = ['/']
+        paths += [
+            f'/category/{slug}'
+            for slug in db.session.scalars(select(Category.slug))
+        ]
+        paths += [f'/tag/{slug}' for slug in db.session.scalars(select(Tag.slug))]
+        paths += [
+            f'/blog/{slug}' for slug in db.session.scalars(
+                select(Article.slug).where(Article.published.is_(True)).
+                order_by(Article.updated_at.desc()).limit(limit))
+        ]
+    return paths[:limit]
+
+
+def warm_paths(limit=None):
+    return sitemap_paths(limit) or database_paths(limit)
+
+
+class RateLimiter:
+    """Spread calls evenly at ``rate`` per second across threads."""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def warm(paths, fetch, workers=4, rate=10.0):
+    """Request every path with ``fetch(path) -> status``; return a summary."""
+    limiter = RateLimiter(rate)
+    started = time.monotonic()
+
+    def one(path):
+        limiter.wait()
+        try:
+            return fetch(path)
+        except Exception as e:
+            logger.debug("Warming %s failed: %s", path, e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        statuses = list(pool.map(one, paths))
+    summary = {
+        'urls': len(paths),
+        'ok': sum(1 for s in statuses if s and s < 400),
+        'failed': sum(1 for s in statuses if not s or s >= 400),
+        'seconds': round(time.monotonic() - started, 2),
+    }
+    logger.info("Cache warm: %(ok)d/%(urls)d ok in %(seconds).2fs", summary)
+    return summary
+
+
+def local_fetch(path, base_url):
+    """Render ``path`` inside this process so its page cache gets filled."""
+    with app.test_client() as client:
+        return client.get(path, base_url=base_url,
+                          headers={WARM_HEADER: '1'}).status_code
+
+
+def http_fetcher(base_url, timeout=10):
+
+    def fetch(path):
+        request = urllib.request.Request(base_url.rstrip('/') + path,
+                                         headers={WARM_HEADER: '1'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+
+    return fetch
+
+
+def site_url():
+    """Public site address for in-process warming, or None if unknown."""
+    url = os.environ.get('SITE_URL')
+    if not url and has_request_context():
+        url = request.url_root
+    return url.rstrip('/') + '/' if url else None
+
+
+def warm_local(base_url):
+    """Warm this process's caches with the configured limits."""
+    config = app.config
+    return warm(warm_paths(config['CACHE_WARM_LIMIT']),
+                partial(local_fetch, base_url=base_url),
+                workers=config['CACHE_WARM_WORKERS'],
+                rate=config['CACHE_WARM_RATE'])
+
+
+_state_lock = threading.Lock()
+_running = False
+_again = False
+
+
+def warm_in_background():
+    """Start warm_local() in a thread; calls made while it runs coalesce into one rerun."""
+    global _running, _again
+    if not app.config['CACHE_WARM_ENABLED']:
+        return
+    base_url = site_url()
+    if base_url is None:
+        logger.info("Cache warm skipped: SITE_URL is not set")
+        return
+    with _state_lock:
+        if _running:
+            _again = True
+            return
+        _running = True
+    threading.Thread(target=_background_loop,
+                     args=(base_url, ),
+                     name='cache-warmer',
+                     daemon=True).start()
+
+
+def _background_loop(base_url):
+    global _running, _again
+    while True:
+        try:
+            warm_local(base_url)
+        except Exception as e:
+            logger.warning("Background cache warm failed: %s", e)
+        with _state_lock:
+            if not _again:
+                _running = False
+                return
+            _again = False
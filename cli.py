@@ -0,0 +1,140 @@
+"""
+Команды Flask CLI для разовой инициализации.
+
+Раньше создание схемы и администратора выполнялось при каждом импорте app.py,
+то есть в каждом воркере Gunicorn. Теперь это явные шаги развёртывания:
+
+    flask --app main bootstrap        # init-db + create-admin
+    flask --app main init-db
+    flask --app main create-admin
+    flask --app main precompile-templates
+    flask --app main warm-cache       # после деплоя, по HTTP на SITE_URL
+                                      # (кэш воркеров греет post_worker_init)
+    flask --app main rebuild-tag-stats
+"""
+
+import logging
+import os
+
+import click
+
+
+def register_commands(app):
+    """Attach the bootstrap commands to ``app.cli``."""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing database tables."""
+        init_db()
+        click.echo('Database tables created/verified.')
+
+    @app.cli.command('create-admin')
+    def create_admin_command():
+        """Create the default admin user if it does not exist."""
+        from app import ADMIN_USERNAME, ADMIN_PASSWORD
+        if ensure_admin():
+            click.echo(f"Admin user '{ADMIN_USERNAME}' created "
+                       f"(password: {ADMIN_PASSWORD}).")
+        else:
+            click.echo(f"Admin user '{ADMIN_USERNAME}' already exists.")
+
+    @app.cli.command('precompile-templates')
+    def precompile_templates_command():
+        """Compile all templates into the shared bytecode cache."""
+        from templating import precompile_templates
+        count = precompile_templates(app)
+        click.echo(f"{count} templates compiled into "
+                   f"{app.config['TEMPLATE_BYTECODE_DIR']}.")
+
+    @app.cli.command('replica-status')
+    def replica_status_command():
+        """Show lag and availability of the read replicas."""
+        from app import db
+        from db_routing import router
+        status = router.status(db)
+        if not status:
+            click.echo('No replicas configured (DATABASE_REPLICA_URLS).')
+        for key, info in status.items():
+            state = f"lag {info['lag']:.2f}s" if info['ok'] else 'unavailable'
+            click.echo(f"{key}: {state}")
+
+    @app.cli.command('warm-cache')
+    @click.option('--base-url',
+                  default=None,
+                  help='Site to warm over HTTP (default: SITE_URL).')
+    @click.option('--limit', type=int, default=None,
+                  help='Number of URLs (default: CACHE_WARM_LIMIT).')
+    @click.option('--workers', type=int, default=None,
+                  help='Concurrent requests (default: CACHE_WARM_WORKERS).')
+    @click.option('--rate', type=float, default=None,
+                  help='Requests per second (default: CACHE_WARM_RATE).')
+    def warm_cache_command(base_url, limit, workers, rate):
+        """Request the top sitemap URLs over HTTP.
+
+        Each request lands on whichever worker the balancer picks, so this
+        fills shared caches (CDN, proxy) but not every worker's in-process
+        cache; workers warm their own on start (post_worker_init).
+        """
+        from cache_warmer import http_fetcher, warm, warm_paths
+        base_url = base_url or os.environ.get('SITE_URL',
+                                              'http://localhost:5000')
+        paths = warm_paths(limit or app.config['CACHE_WARM_LIMIT'])
+        summary = warm(paths,
+                       http_fetcher(base_url),
+                       workers=workers or app.config['CACHE_WARM_WORKERS'],
+                       rate=rate or app.config['CACHE_WARM_RATE'])
+        click.echo(f"Warmed {summary['ok']}/{summary['urls']} URLs on "
+                   f"{base_url} in {summary['seconds']}s "
+                   f"({summary['failed']} failed).")
+
+    @app.cli.command('rebuild-tag-stats')
+    def rebuild_tag_stats_command():
+        """Recompute tag co-occurrence and tag/category counts."""
+        from app import db
+        import tag_stats
+        tag_stats.rebuild()
+        db.session.commit()
+        click.echo('Tag statistics rebuilt.')
+
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Run init-db and create-admin."""
+        init_db()
+        created = ensure_admin()
+        click.echo('Bootstrap completed'
+                   f"{' (admin user created)' if created else ''}.")
+
+
+def init_db():
+    """Create all tables for the registered models and fill the derived ones."""
+    from app import db
+    import models  # noqa: F401
+    import tag_stats
+
+    db.create_all()
+    tag_stats.rebuild()
+    db.session.commit()
+
+
+def ensure_admin():
+    """Insert the default admin user; return True if it was created."""
+    from werkzeug.security import generate_password_hash
+    from app import db, ADMIN_USERNAME, ADMIN_PASSWORD, ADMIN_EMAIL
+    from models import User
+
+    if User.query.filter_by(username=ADMIN_USERNAME).first():
+        return False
+
+    try:
+        db.session.add(
+            User(username=ADMIN_USERNAME,
+                 email=ADMIN_EMAIL,
+                 password_hash=generate_password_hash(ADMIN_PASSWORD),
+                 is_admin=True))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error("Error creating admin user: %s", e)
+        raise
+    logging.info("Admin user '%s' created successfully.", ADMIN_USERNAME)
+    return True
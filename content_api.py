@@ -0,0 +1,307 @@
+"""
+Публичный read-only JSON API /api/v1 для статей, категорий и тегов.
+
+* ``fields=id,title,...`` — выбор полей, ``embed=category,tags,author`` —
+  вложенные связи; связи промахов подгружаются пачкой (selectinload), без
+  N+1.
+* Списки статей — keyset-пагинация по (created_at, id) с непрозрачным
+  курсором, как в админской таблице.
+* Сериализованный JSON каждой статьи хранится в fragment_cache под ключом
+  её версии (updated_at + версии вложенных сущностей), поэтому страница
+  списка при тёплом кэше — один узкий индексный запрос и склейка байтов.
+  Списки категорий и тегов целиком кэшируются по штампу версии.
+* Ответы отдаются с ETag и поддерживают If-None-Match (304).
+
+Кодирование — orjson, если он установлен, иначе стандартный json.
+"""
+
+import json
+
+from flask import Response, request, url_for
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.exceptions import HTTPException
+
+from admin_api import decode_cursor, encode_cursor
+from app import app, db, fragment_cache
+from db_routing import read_replica
+from models import Article, Category, Tag, article_tags
+from versions import version_key
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+CACHE_TIMEOUT = 3600
+
+ARTICLE_FIELDS = ('id', 'title', 'slug', 'summary', 'content', 'created_at',
+                  'updated_at', 'meta_title', 'meta_description',
+                  'meta_keywords', 'url')
+DEFAULT_ARTICLE_FIELDS = ('id', 'title', 'slug', 'summary', 'created_at',
+                          'updated_at', 'url')
+# Вложенная связь -> штамп версии, от которого зависит её содержимое
+ARTICLE_EMBEDS = {
+    'category': ('categories', ),
+    'tags': ('tags', ),
+    'author': (),
+}
+
+
+def dumps(obj):
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@app.errorhandler(ApiError)
+def handle_api_error(error):
+    return Response(dumps({'error': error.message}),
+                    status=error.status,
+                    mimetype='application/json')
+
+
+def _json_response(body):
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def _selection(name, allowed, default):
+    raw = request.args.get(name)
+    if raw is None:
+        return tuple(default)
+    selected = tuple(sorted({part.strip() for part in raw.split(',')} - {''}))
+    unknown = [part for part in selected if part not in allowed]
+    if unknown:
+        raise ApiError(400, f"Unknown {name}: {', '.join(unknown)}")
+    return selected
+
+
+def _limit():
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _decode(cursor, sort):
+    try:
+        return decode_cursor(cursor, sort)
+    except HTTPException:
+        raise ApiError(400, 'Invalid cursor')
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _category_dict(category):
+    return {
+        'id': category.id,
+        'name': category.name,
+        'slug': category.slug,
+        'description': category.description,
+        'url': url_for('category', slug=category.slug),
+    }
+
+
+def _tag_dict(tag):
+    return {
+        'id': tag.id,
+        'name': tag.name,
+        'slug': tag.slug,
+        'url': url_for('tag', slug=tag.slug),
+    }
+
+
+def _article_dict(article, fields, embed):
+    data = {}
+    for field in fields:
+        if field == 'url':
+            data['url'] = url_for('article', slug=article.slug)
+        elif field in ('created_at', 'updated_at'):
+            data[field] = _isoformat(getattr(article, field))
+        else:
+            data[field] = getattr(article, field)
+    if 'category' in embed:
+        data['category'] = (_category_dict(article.category)
+                            if article.category else None)
+    if 'tags' in embed:
+        data['tags'] = [_tag_dict(tag) for tag in article.tags]
+    if 'author' in embed:
+        data['author'] = {'username': article.author.username}
+    return data
+
+
+def _article_key(article_id, updated_at, fields, embed, embed_version):
+    return 'api:v1:article:%d:%s:%s:%s:%s' % (
+        article_id, _isoformat(updated_at), ','.join(fields), ','.join(embed),
+        embed_version)
+
+
+def _article_payloads(rows, fields, embed):
+    """Return serialized JSON for (id, updated_at) rows, loading misses in one batch."""
+    embed_version = version_key(*sorted(
+        {dep
+         for name in embed for dep in ARTICLE_EMBEDS[name]}))
+    keys = [
+        _article_key(row.id, row.updated_at, fields, embed, embed_version)
+        for row in rows
+    ]
+    cached = fragment_cache.get_many(*keys) if keys else []
+    # По id, а не по ключу: если updated_at сменился между запросом списка
+    # и загрузкой, статья попадёт в ответ под новым ключом, а не выпадет
+    payloads = {row.id: payload for row, payload in zip(rows, cached)}
+
+    missing = [row.id for row in rows if payloads[row.id] is None]
+    if missing:
+        options = []
+        if 'category' in embed:
+            options.append(joinedload(Article.category))
+        if 'author' in embed:
+            options.append(joinedload(Article.author))
+        if 'tags' in embed:
+            options.append(selectinload(Article.tags))
+        fresh = {}
+        for article in db.session.scalars(
+                select(Article).options(*options).where(
+                    Article.id.in_(missing))).unique():
+            key = _article_key(article.id, article.updated_at, fields, embed,
+                               embed_version)
+            payloads[article.id] = fresh[key] = dumps(
+                _article_dict(article, fields, embed))
+        if fresh:
+            fragment_cache.set_many(fresh, timeout=CACHE_TIMEOUT)
+    # Пропадают только статьи, удалённые между двумя запросами
+    return [payloads[row.id] for row in rows if payloads[row.id] is not None]
+
+
+def _list_body(items, next_cursor):
+    return b''.join((b'{"items":[', b','.join(items), b'],"next_cursor":',
+                     dumps(next_cursor), b'}'))
+
+
+@app.route('/api/v1/articles')
+@read_replica
+def api_articles():
+    fields = _selection('fields', ARTICLE_FIELDS, DEFAULT_ARTICLE_FIELDS)
+    embed = _selection('embed', ARTICLE_EMBEDS, ())
+    limit = _limit()
+
+    stmt = select(Article.id, Article.updated_at,
+                  Article.created_at).where(Article.published.is_(True))
+    category_slug = request.args.get('category')
+    if category_slug:
+        stmt = stmt.join(Category, Article.category_id == Category.id).where(
+            Category.slug == category_slug)
+    tag_slug = request.args.get('tag')
+    if tag_slug:
+        stmt = stmt.join(article_tags,
+                         article_tags.c.article_id == Article.id).join(
+                             Tag, Tag.id == article_tags.c.tag_id).where(
+                                 Tag.slug == tag_slug)
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, last_id = _decode(cursor, 'created_at')
+        stmt = stmt.where(
+            or_(Article.created_at < created_at,
+                and_(Article.created_at == created_at,
+                     Article.id < last_id)))
+    stmt = stmt.order_by(Article.created_at.desc(),
+                         Article.id.desc()).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return _json_response(
+        _list_body(_article_payloads(rows, fields, embed), next_cursor))
+
+
+@app.route('/api/v1/articles/<slug>')
+@read_replica
+def api_article(slug):
+    fields = _selection('fields', ARTICLE_FIELDS, ARTICLE_FIELDS)
+    embed = _selection('embed', ARTICLE_EMBEDS, tuple(ARTICLE_EMBEDS))
+    row = db.session.execute(
+        select(Article.id, Article.updated_at).where(
+            Article.slug == slug, Article.published.is_(True))).first()
+    if row is None:
+        raise ApiError(404, 'Article not found')
+    payloads = _article_payloads([row], fields, embed)
+    if not payloads:
+        # Статью удалили между двумя запросами
+        raise ApiError(404, 'Article not found')
+    return _json_response(payloads[0])
+
+
+def _versioned_list(model, dep, serialize):
+    """Serve a cursor-paginated list of ``model``, cached per ``dep`` version."""
+    limit = _limit()
+    cursor = request.args.get('cursor')
+    key = 'api:v1:%s:%s:%s:%d' % (model.__tablename__, version_key(dep),
+                                  cursor or '', limit)
+    body = fragment_cache.get(key)
+    if body is None:
+        stmt = select(model).order_by(model.id)
+        if cursor:
+            stmt = stmt.where(model.id > _decode(cursor, 'id')[1])
+        objects = db.session.scalars(stmt.limit(limit + 1)).all()
+        next_cursor = None
+        if len(objects) > limit:
+            objects = objects[:limit]
+            next_cursor = encode_cursor(objects[-1].id, objects[-1].id)
+        body = _list_body([dumps(serialize(obj)) for obj in objects],
+                          next_cursor)
+        fragment_cache.set(key, body, timeout=CACHE_TIMEOUT)
+    return _json_response(body)
+
+
+def _versioned_item(model, dep, serialize, slug):
+    key = 'api:v1:%s:%s:%s' % (model.__tablename__, version_key(dep), slug)
+    body = fragment_cache.get(key)
+    if body is None:
+        obj = db.session.scalars(select(model).where(
+            model.slug == slug)).first()
+        if obj is None:
+            raise ApiError(404, f'{model.__name__} not found')
+        body = dumps(serialize(obj))
+        fragment_cache.set(key, body, timeout=CACHE_TIMEOUT)
+    return _json_response(body)
+
+
+@app.route('/api/v1/categories')
+@read_replica
+def api_categories():
+    return _versioned_list(Category, 'categories', _category_dict)
+
+
+@app.route('/api/v1/categories/<slug>')
+@read_replica
+def api_category(slug):
+    return _versioned_item(Category, 'categories', _category_dict, slug)
+
+
+@app.route('/api/v1/tags')
+@read_replica
+def api_tags():
+    return _versioned_list(Tag, 'tags', _tag_dict)
+
+
+@app.route('/api/v1/tags/<slug>')
+@read_replica
+def api_tag(slug):
+    return _versioned_item(Tag, 'tags', _tag_dict, slug)
@@ -0,0 +1,131 @@
+"""
+Отдача sitemap.xml и robots.txt из памяти процесса.
+
+Краулеры запрашивают оба файла постоянно. Файл читается один раз на свою
+версию (mtime и размер), подготовленный вариант хранится готовыми байтами
+вместе с gzip-копией, ETag и Last-Modified. Запрос обходится без чтения
+файла и строковых операций: условный GET получает 304, остальные — байты
+из памяти, сжатые, если клиент принимает gzip.
+
+Актуальность проверяется stat() не чаще раза в CHECK_INTERVAL секунд;
+generate_sitemap() пишет файл атомарно (os.replace), так что другие воркеры
+подхватывают новую версию целиком. robots.txt подставляет адрес сайта, и
+вариантов столько, сколько разных адресов (обычно один — SITE_URL).
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+
+from app import app
+
+CHECK_INTERVAL = 2.0
+# Меньше этого сжатие не окупает лишний заголовок
+GZIP_MIN_SIZE = 512
+MAX_AGE = 3600
+# Варианты зависят от заголовка Host, если SITE_URL не задан
+MAX_VARIANTS = 16
+
+
+class Prepared:
+    __slots__ = ('body', 'gzipped', 'etag', 'gzip_etag', 'last_modified')
+
+    def __init__(self, body, mtime_ns):
+        self.body = body
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.etag = digest
+        if len(body) >= GZIP_MIN_SIZE:
+            self.gzipped = gzip.compress(body, 9, mtime=0)
+            self.gzip_etag = f'{digest}-gz'
+        else:
+            self.gzipped = self.gzip_etag = None
+        self.last_modified = datetime.fromtimestamp(mtime_ns // 10**9,
+                                                    timezone.utc)
+
+
+class PreparedFile:
+    """A small static file kept in memory, re-read only when it changes."""
+
+    def __init__(self, path, mimetype, transform=None):
+        self.path = path
+        self.mimetype = mimetype
+        self.transform = transform
+        self._stamp = None
+        self._checked = 0.0
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < CHECK_INTERVAL:
+            return
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._checked = now
+            if stamp != self._stamp:
+                self._stamp = stamp
+                self._variants = {}
+
+    def get(self, variant=None):
+        """Return the Prepared bytes of ``variant`` (the transform argument)."""
+        self._refresh()
+        prepared = self._variants.get(variant)
+        if prepared is None:
+            with self._lock:
+                with open(self.path, 'rb') as f:
+                    body = f.read()
+                    mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                if self.transform is not None:
+                    body = self.transform(body, variant)
+                prepared = Prepared(body, mtime_ns)
+                if len(self._variants) >= MAX_VARIANTS:
+                    self._variants = {}
+                self._variants[variant] = prepared
+        return prepared
+
+    def reset(self):
+        with self._lock:
+            self._stamp = None
+            self._checked = 0.0
+            self._variants = {}
+
+    def serve(self, variant=None):
+        prepared = self.get(variant)
+        use_gzip = (prepared.gzipped is not None
+                    and 'gzip' in request.accept_encodings)
+        etag = prepared.gzip_etag if use_gzip else prepared.etag
+        headers = {
+            'Cache-Control': f'public, max-age={MAX_AGE}',
+            'Vary': 'Accept-Encoding',
+        }
+        if not is_resource_modified(request.environ,
+                                    etag=etag,
+                                    last_modified=prepared.last_modified):
+            response = Response(status=304, headers=headers)
+        else:
+            response = Response(
+                prepared.gzipped if use_gzip else prepared.body,
+                mimetype=self.mimetype,
+                headers=headers)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag)
+        response.last_modified = prepared.last_modified
+        return response
+
+
+def _robots_transform(body, site_url):
+    return body.replace(b'{{site_url}}', site_url.encode('utf-8'))
+
+
+sitemap = PreparedFile(os.path.join(app.static_folder, 'sitemap.xml'),
+                       'application/xml')
+robots = PreparedFile(os.path.join(app.static_folder, 'robots.txt'),
+                      'text/plain', _robots_transform)
@@ -0,0 +1,242 @@
+"""
+Маршрутизация чтения на реплики БД на уровне сессии.
+
+Публичные GET-представления помечаются декоратором ``read_replica``; их
+SELECT-запросы уходят на одну из реплик из DATABASE_REPLICA_URLS. Всё
+остальное (админка, flush, UPDATE/DELETE/INSERT) идёт на основную БД.
+
+Реплика не используется, если:
+
+* её задержка больше REPLICA_MAX_LAG секунд или последняя проверка упала
+  (проверка не чаще раза в REPLICA_LAG_CHECK_INTERVAL секунд на процесс);
+* этот процесс записывал в БД последние READ_YOUR_WRITES_SECONDS секунд
+  (например, генерация sitemap сразу после сохранения статьи);
+* у клиента есть отметка read-your-writes в сессии Flask, которую ставит
+  любой запрос с записью (админ видит свою правку сразу после сохранения).
+
+Локальная проверка с двумя файлами SQLite:
+
+    cp blog.db replica.db
+    DATABASE_URL=sqlite:///blog.db DATABASE_REPLICA_URLS=sqlite:///replica.db \\
+        flask --app main replica-status
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask import session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+_STICKY_SESSION_KEY = '_db_primary_until'
+
+# Запросы, возвращающие задержку реплики в секундах, по диалекту. Для
+# диалектов без репликации (sqlite) задержка считается нулевой.
+LAG_QUERIES = {
+    'postgresql':
+    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - "
+    "pg_last_xact_replay_timestamp()), 0)",
+}
+
+
+class ReadOnlyRequestError(RuntimeError):
+    """A read-only request tried to write to the database."""
+
+
+def replica_binds(urls):
+    """Build SQLALCHEMY_BINDS entries from a comma-separated list of URLs."""
+    return {
+        f'{REPLICA_BIND_PREFIX}{i}': url.strip()
+        for i, url in enumerate(u for u in urls.split(',') if u.strip())
+    }
+
+
+class ReplicaRouter:
+    """Per-process replica health, lag and write tracking."""
+
+    def __init__(self):
+        self._status = {}
+        self._last_write = 0.0
+
+    def note_write(self):
+        self._last_write = time.monotonic()
+
+    def wrote_recently(self):
+        window = current_app.config['READ_YOUR_WRITES_SECONDS']
+        return time.monotonic() - self._last_write < window
+
+    def pick(self, db):
+        """Return a usable replica engine, or None to fall back to the primary."""
+        engines = db.engines
+        keys = [
+            k for k in engines
+            if k and k.startswith(REPLICA_BIND_PREFIX) and self._usable(
+                k, engines[k])
+        ]
+        return engines[random.choice(keys)] if keys else None
+
+    def status(self, db):
+        engines = db.engines
+        return {
+            key: self._check(key, engines[key])
+            for key in engines if key and key.startswith(REPLICA_BIND_PREFIX)
+        }
+
+    def _usable(self, key, engine):
+        cached = self._status.get(key)
+        interval = current_app.config['REPLICA_LAG_CHECK_INTERVAL']
+        if cached is None or time.monotonic() - cached['checked'] > interval:
+            cached = self._check(key, engine)
+        return cached['ok'] and cached['lag'] <= current_app.config[
+            'REPLICA_MAX_LAG']
+
+    def _check(self, key, engine):
+        query = current_app.config.get('REPLICA_LAG_QUERY') or LAG_QUERIES.get(
+            engine.dialect.name)
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(text(query)).scalar()
+                            or 0) if query else 0.0
+            status = {'ok': True, 'lag': lag}
+        except Exception as e:
+            logger.warning("Replica %s unavailable, using primary: %s", key,
+                           e)
+            status = {'ok': False, 'lag': float('inf')}
+        status['checked'] = time.monotonic()
+        self._status[key] = status
+        return status
+
+
+router = ReplicaRouter()
+
+
+def _reads_go_to_replica():
+    if not has_app_context() or not g.get('db_read_replica'):
+        return False
+    if router.wrote_recently():
+        return False
+    if has_request_context(
+    ) and flask_session.get(_STICKY_SESSION_KEY, 0) > time.time():
+        return False
+    return True
+
+
+class RoutingSession(Session):
+    """Session that sends reads of replica-routed views to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing
+                and not self.info.get('wrote')
+                and not isinstance(clause, UpdateBase)
+                and _reads_go_to_replica()):
+            engine = router.pick(self._db)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper,
+                                clause=clause,
+                                bind=bind,
+                                **kwargs)
+
+
+def is_read_only():
+    """True inside a safe-method request to a ``read_replica`` view."""
+    return has_app_context() and g.get('db_read_only', False)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _guard_flush(session, flush_context, instances):
+    if is_read_only() and (session.new or session.dirty or session.deleted):
+        raise ReadOnlyRequestError('flush in a read-only request')
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_dml(orm_execute_state):
+    if (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        if is_read_only():
+            raise ReadOnlyRequestError('DML in a read-only request')
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    if session.info.pop('wrote', False):
+        router.note_write()
+        if has_request_context():
+            g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
+
+def read_replica(view):
+    """Mark a view as read-only: its queries may be served by a replica.
+
+    For GET/HEAD/OPTIONS the request is also read-only: any flush or DML
+    raises ReadOnlyRequestError and after_request never commits.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = True
+        g.db_read_only = request.method in SAFE_METHODS
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def use_replica():
+    """Route reads inside the block to a replica (outside of views)."""
+    previous = g.get('db_read_replica', False)
+    g.db_read_replica = True
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+@contextmanager
+def use_primary():
+    """Route reads inside the block to the primary, even in replica views.
+
+    For data cached under the current content version: a lagging replica
+    would pin stale rows to the new version until the next bump.
+    """
+    previous = g.get('db_read_replica', False)
+    g.db_read_replica = False
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+def init_app(app):
+    app.config.setdefault('REPLICA_MAX_LAG', 5.0)
+    app.config.setdefault('REPLICA_LAG_CHECK_INTERVAL', 5.0)
+    app.config.setdefault('READ_YOUR_WRITES_SECONDS', 10.0)
+
+    @app.after_request
+    def remember_primary_for_client(response):
+        # Read-your-writes между воркерами: клиент, который только что
+        # записал, читает с основной БД, пока реплики догоняют
+        if g.get('db_wrote'):
+            flask_session[_STICKY_SESSION_KEY] = (
+                time.time() + app.config['READ_YOUR_WRITES_SECONDS'])
+        return response
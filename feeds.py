@@ -0,0 +1,197 @@
+"""
+Atom/RSS ленты: общая, по категории и по тегу.
+
+Лента строится один раз на версию контента (штамп versions.CONTENT,
+сдвигается в invalidate_content) и хранится в fragment_cache готовыми
+байтами. ETag и Last-Modified выводятся из того же штампа, поэтому
+условный GET от агрегатора проверяется одним stat() и получает 304, не
+трогая базу и не собирая ленту.
+
+В ленту попадают только сохранённые summary/meta_description, content
+статьи не загружается.
+"""
+
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from flask import Response, abort, request
+from sqlalchemy import select
+from werkzeug.http import is_resource_modified
+
+from app import app, db, fragment_cache
+from db_routing import read_replica, use_primary
+from models import Article, Category, Tag, User, article_tags
+import versions
+
+FEED_TITLE = 'Developer Blog'
+FEED_SIZE = 20
+CONTENT_TYPES = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+}
+
+
+def _base_url():
+    return os.environ.get('SITE_URL', 'http://localhost:5000').rstrip('/')
+
+
+def _utc(value):
+    return (value or datetime.utcnow()).replace(tzinfo=timezone.utc)
+
+
+def feed_entries(category_id=None, tag_id=None, limit=FEED_SIZE):
+    """Return the newest published articles as lightweight rows."""
+    stmt = select(
+        Article.title, Article.slug, Article.summary,
+        Article.meta_description, Article.created_at, Article.updated_at,
+        User.username).join(User, Article.user_id == User.id).where(
+            Article.published.is_(True))
+    if category_id is not None:
+        stmt = stmt.where(Article.category_id == category_id)
+    if tag_id is not None:
+        stmt = stmt.join(article_tags,
+                         article_tags.c.article_id == Article.id).where(
+                             article_tags.c.tag_id == tag_id)
+    stmt = stmt.order_by(Article.created_at.desc(),
+                         Article.id.desc()).limit(limit)
+    return db.session.execute(stmt).all()
+
+
+def render_atom(title, page_url, feed_url, entries, updated):
+    base_url = _base_url()
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f'  <title>{escape(title)}</title>\n',
+        f'  <id>{escape(feed_url)}</id>\n',
+        f'  <link rel="self" href="{escape(feed_url)}"/>\n',
+        f'  <link rel="alternate" href="{escape(page_url)}"/>\n',
+        f'  <updated>{_utc(updated).isoformat()}</updated>\n',
+    ]
+    for entry in entries:
+        url = f'{base_url}/blog/{entry.slug}'
+        summary = entry.summary or entry.meta_description or ''
+        parts.append(
+            '  <entry>\n'
+            f'    <title>{escape(entry.title)}</title>\n'
+            f'    <id>{escape(url)}</id>\n'
+            f'    <link rel="alternate" href="{escape(url)}"/>\n'
+            f'    <published>{_utc(entry.created_at).isoformat()}</published>\n'
+            f'    <updated>{_utc(entry.updated_at).isoformat()}</updated>\n'
+            f'    <author><name>{escape(entry.username)}</name></author>\n'
+            f'    <summary>{escape(summary)}</summary>\n'
+            '  </entry>\n')
+    parts.append('</feed>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def render_rss(title, page_url, feed_url, entries, updated):
+    base_url = _base_url()
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"'
+        ' xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        '<channel>\n',
+        f'  <title>{escape(title)}</title>\n',
+        f'  <link>{escape(page_url)}</link>\n',
+        f'  <description>{escape(title)}</description>\n',
+        f'  <atom:link href="{escape(feed_url)}" rel="self" '
+        'type="application/rss+xml"/>\n',
+        f'  <lastBuildDate>{format_datetime(_utc(updated))}</lastBuildDate>\n',
+    ]
+    for entry in entries:
+        url = f'{base_url}/blog/{entry.slug}'
+        summary = entry.summary or entry.meta_description or ''
+        parts.append(
+            '  <item>\n'
+            f'    <title>{escape(entry.title)}</title>\n'
+            f'    <link>{escape(url)}</link>\n'
+            f'    <guid isPermaLink="true">{escape(url)}</guid>\n'
+            f'    <pubDate>{format_datetime(_utc(entry.created_at))}</pubDate>\n'
+            # <author> в RSS 2.0 — только email; имя автора идёт в dc:creator
+            f'    <dc:creator>{escape(entry.username)}</dc:creator>\n'
+            f'    <description>{escape(summary)}</description>\n'
+            '  </item>\n')
+    parts.append('</channel>\n</rss>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+RENDERERS = {'atom': render_atom, 'rss': render_rss}
+
+
+def _serve(fmt, scope, build):
+    """Answer a feed request; ``build()`` runs only on a cache miss."""
+    version = versions.get_version(versions.CONTENT)
+    etag = f'{scope}-{fmt}-{version}'
+    last_modified = (datetime.fromtimestamp(version / 1e9, timezone.utc)
+                     if version else None)
+    headers = {'Cache-Control': 'public, max-age=300'}
+
+    if not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    key = f'feed:{etag}'
+    body = fragment_cache.get(key)
+    if body is None:
+        # Лента кэшируется под текущей версией контента до следующего
+        # сдвига, поэтому собирается с основной БД, а не с реплики
+        with use_primary():
+            body = build()
+        fragment_cache.set(key, body)
+
+    response = Response(body, mimetype=CONTENT_TYPES[fmt], headers=headers)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def _build(fmt, title, path, entries):
+    base_url = _base_url()
+    feed_url = f'{base_url}{path}/feed.{fmt}' if path else (
+        f'{base_url}/feed.{fmt}')
+    page_url = f'{base_url}{path}' if path else f'{base_url}/'
+    updated = max((entry.updated_at for entry in entries), default=None)
+    return RENDERERS[fmt](title, page_url, feed_url, entries, updated)
+
+
+@app.route('/feed.<any(atom, rss):fmt>')
+@read_replica
+def feed(fmt):
+    return _serve(fmt, 'all',
+                  lambda: _build(fmt, FEED_TITLE, '', feed_entries()))
+
+
+@app.route('/category/<slug>/feed.<any(atom, rss):fmt>')
+@read_replica
+def category_feed(slug, fmt):
+
+    def build():
+        category = db.session.scalars(
+            select(Category).where(Category.slug == slug)).first()
+        if category is None:
+            abort(404)
+        return _build(fmt, f'{category.name} | {FEED_TITLE}',
+                      f'/category/{slug}',
+                      feed_entries(category_id=category.id))
+
+    return _serve(fmt, f'category-{slug}', build)
+
+
+@app.route('/tag/<slug>/feed.<any(atom, rss):fmt>')
+@read_replica
+def tag_feed(slug, fmt):
+
+    def build():
+        tag = db.session.scalars(select(Tag).where(Tag.slug == slug)).first()
+        if tag is None:
+            abort(404)
+        return _build(fmt, f'#{tag.name} | {FEED_TITLE}', f'/tag/{slug}',
+                      feed_entries(tag_id=tag.id))
+
+    return _serve(fmt, f'tag-{slug}', build)
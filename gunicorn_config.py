@@ -5,10 +5,13 @@
 и предотвращения зависаний под нагрузкой.
 """
 
+import logging
 import multiprocessing
 import os
 import resource
 
+from gunicorn import glogging
+
 # Основные настройки сервера
 bind = "0.0.0.0:5000"
 workers = multiprocessing.cpu_count() * 2 + 1  # Рекомендуемое количество
@@ -31,53 +34,17 @@ graceful_timeout = 30  # Время ожидания до принудитель
 keepalive = 5  # Сохранять соединение в течение 5 секунд после запроса
 
 # Кастомный класс логгера для подавления WINCH сообщений
-class CustomLogger:
+class WinchFilter(logging.Filter):
+    def filter(self, record):
+        return 'winch' not in record.getMessage().lower()
+
+
+class CustomLogger(glogging.Logger):
     def setup(self, cfg):
-        from gunicorn import glogging
-        import logging
-        
-        self._logger = glogging.Logger(cfg)
-        self._logger.setup(cfg)
-        
-        # Получаем оригинальный обработчик
-        self.error_handlers = self._logger.error_handlers
-        
-        # Создаем фильтр для WINCH
-        class WinchFilter(logging.Filter):
-            def filter(self, record):
-                return 'Handling signal: winch' not in record.getMessage()
-                
-        # Добавляем фильтр ко всем обработчикам логов
-        for handler in self.error_handlers:
+        super().setup(cfg)
+        # Фильтр на обработчики error-лога (туда пишет и info/debug мастера)
+        for handler in self.error_log.handlers:
             handler.addFilter(WinchFilter())
-    
-    # Проксируем все методы к внутреннему логгеру
-    def critical(self, msg, *args, **kwargs):
-        self._logger.critical(msg, *args, **kwargs)
-    
-    def error(self, msg, *args, **kwargs):
-        self._logger.error(msg, *args, **kwargs)
-    
-    def warning(self, msg, *args, **kwargs):
-        self._logger.warning(msg, *args, **kwargs)
-    
-    def info(self, msg, *args, **kwargs):
-        if 'winch' not in msg.lower():
-            self._logger.info(msg, *args, **kwargs)
-    
-    def debug(self, msg, *args, **kwargs):
-        if 'winch' not in msg.lower():
-            self._logger.debug(msg, *args, **kwargs)
-    
-    def exception(self, msg, *args, **kwargs):
-        self._logger.exception(msg, *args, **kwargs)
-    
-    def log(self, lvl, msg, *args, **kwargs):
-        if 'winch' not in msg.lower():
-            self._logger.log(lvl, msg, *args, **kwargs)
-    
-    def access(self, resp, req, environ, request_time):
-        self._logger.access(resp, req, environ, request_time)
 
 # Логирование с улучшенной гибкостью
 accesslog = "-"  # Выводить логи доступа в stdout
@@ -86,8 +53,14 @@ loglevel = "info"
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(L)s'
 logger_class = 'gunicorn_config.CustomLogger'
 
+# Приложение загружается в мастере до fork: шаблоны, read model и прочие
+# объекты из when_ready достаются воркерам копированием при записи.
+# Перезагрузка при изменении файлов с этим несовместима, поэтому только
+# для разработки: GUNICORN_RELOAD=1 отключает preload.
+reload = os.environ.get("GUNICORN_RELOAD", "0") not in ("0", "false", "no")
+preload_app = not reload
+
 # Отладочные возможности
-reload = True  # Перезагрузка при изменении файлов
 spew = False  # Включать подробное логирование трассировки (в случае необходимости отладки установите True)
 
 # Регулирование нагрузки для предотвращения перегрузки
@@ -109,6 +82,57 @@ def post_fork(server, worker):
     except (ValueError, resource.error):
         pass
 
+def when_ready(server):
+    """Выполняется в мастере перед запуском воркеров"""
+    # С --preload приложение уже загружено в мастере: компилируем шаблоны
+    # здесь, и воркеры получают готовый кэш шаблонов через fork
+    if server.cfg.preload_app:
+        from app import app
+        from templating import precompile_templates
+        try:
+            count = precompile_templates(app)
+            server.log.info("Precompiled %d templates before fork", count)
+        except Exception as e:
+            server.log.warning("Template precompilation failed: %s", e)
+        # Read model тоже строим до fork; gc.freeze() выводит все уже
+        # созданные объекты из-под сборщика мусора, иначе его проходы в
+        # воркерах трогали бы заголовки объектов и копировали общие страницы
+        if app.config['READ_MODEL_ENABLED']:
+            import read_model
+            from app import db
+            try:
+                with app.app_context():
+                    model = read_model.load()
+                    # Соединения SQLite нельзя делить между процессами:
+                    # воркеры откроют свои
+                    for engine in db.engines.values():
+                        engine.dispose()
+                server.log.info("Read model loaded before fork: %d articles",
+                                len(model.articles))
+            except Exception as e:
+                server.log.warning("Read model preload failed: %s", e)
+        import gc
+        gc.freeze()
+
+def post_worker_init(worker):
+    """Выполняется в воркере после загрузки приложения"""
+    # Новый воркер (в том числе после max_requests) прогревает свой кэш
+    # страниц в фоне, не задерживая приём запросов
+    try:
+        from cache_warmer import warm_in_background
+        warm_in_background()
+    except Exception as e:
+        worker.log.warning("Cache warm on worker start failed: %s", e)
+
+def worker_exit(server, worker):
+    """Выполняется в воркере перед выходом"""
+    # Досбрасываем накопленные в памяти счётчики просмотров
+    try:
+        from page_views import counter
+        counter.stop()
+    except Exception as e:
+        server.log.warning("Page view flush on exit failed: %s", e)
+
 def worker_int(worker):
     """Обработчик получения сигнала SIGINT"""
     # Ничего не делаем для предотвращения зависаний из-за несинхронизированного логирования
@@ -0,0 +1,130 @@
+"""
+Кэш страниц с «дырами» для персональных фрагментов.
+
+Кэшированная страница одна на всех посетителей, поэтому в ней не должно
+быть ничего, что зависит от пользователя: меню администратора, кнопки Edit,
+ссылки Login, flash-сообщений. Шаблон вместо такого фрагмента выводит
+``{{ hole('имя', параметры) }}`` — HTML-комментарий-заглушку, и в кэш
+попадает общий «каркас» страницы. Перед отправкой ответа (after_request,
+в том числе для ответов из кэша) каждая заглушка заменяется фрагментом,
+отрендеренным для текущего пользователя из partials/.
+
+Заглушка содержит токен, выведенный из SECRET_KEY, поэтому текст статьи
+не может подставить фрагмент, похожий на заглушку.
+
+Режим ESI (HOLE_PUNCH_ESI=1): если запрос пришёл через прокси, объявивший
+``Surrogate-Capability: ...="ESI/1.0"``, заглушки заменяются на
+``<esi:include src="/_hole/<имя>?...">``, и фрагменты собирает прокси,
+запрашивая /_hole/ отдельно. Без этого заголовка страница собирается на
+сервере, как обычно.
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from flask import abort, make_response, render_template, request
+from markupsafe import Markup, escape
+
+from app import app
+import metrics
+
+# Имя -> (шаблон, параметры и их типы)
+HOLES = {
+    'user-nav': ('partials/user_nav.html', {}),
+    'flashes': ('partials/flashes.html', {}),
+    'login-link': ('partials/login_link.html', {}),
+    'edit-article': ('partials/edit_article_button.html', {
+        'article_id': int
+    }),
+}
+
+_PLACEHOLDER = re.compile(r'<!--hole:(\w+):([\w-]+):([^>]*)-->')
+
+_token = None
+
+
+def _get_token():
+    global _token
+    if _token is None:
+        _token = hashlib.blake2b(str(app.secret_key).encode('utf-8'),
+                                 digest_size=8,
+                                 person=b'hole-punch').hexdigest()
+    return _token
+
+
+@app.template_global()
+def hole(name, **params):
+    """Placeholder for the per-user fragment ``name``."""
+    if name not in HOLES:
+        raise KeyError(f'Unknown hole {name!r}')
+    return Markup(f'<!--hole:{_get_token()}:{name}:'
+                  f'{escape(urlencode(params))}-->')
+
+
+def _params(name, pairs):
+    spec = HOLES[name][1]
+    params = {}
+    for key, value in pairs:
+        if key not in spec:
+            continue
+        try:
+            params[key] = spec[key](value)
+        except ValueError:
+            return None
+    return params if len(params) == len(spec) else None
+
+
+def render(name, pairs):
+    """Render hole ``name`` for the current user; None for bad params."""
+    params = _params(name, pairs)
+    if params is None:
+        return None
+    return render_template(HOLES[name][0], **params)
+
+
+def _esi_requested():
+    return (app.config['HOLE_PUNCH_ESI']
+            and 'ESI/1.0' in request.headers.get('Surrogate-Capability', ''))
+
+
+@app.after_request
+def fill_holes(response):
+    if (response.mimetype != 'text/html' or response.direct_passthrough
+            or response.is_streamed):
+        return response
+    html = response.get_data(as_text=True)
+    if '<!--hole:' not in html:
+        return response
+    token = _get_token()
+    esi = _esi_requested()
+
+    def replace(match):
+        match_token, name, query = match.groups()
+        if match_token != token or name not in HOLES:
+            return match.group(0)
+        query = query.replace('&amp;', '&')
+        if esi:
+            src = f"/_hole/{name}{'?' + query if query else ''}"
+            return f'<esi:include src="{escape(src)}"/>'
+        return render(name, parse_qsl(query)) or ''
+
+    response.set_data(_PLACEHOLDER.sub(replace, html))
+    if esi:
+        response.headers['Surrogate-Control'] = 'content="ESI/1.0"'
+        metrics.incr('hole_punch.esi')
+    else:
+        metrics.incr('hole_punch.filled')
+    return response
+
+
+@app.route('/_hole/<name>')
+def hole_fragment(name):
+    if name not in HOLES:
+        abort(404)
+    html = render(name, request.args.items(multi=True))
+    if html is None:
+        abort(404)
+    response = make_response(html)
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,271 @@
+"""
+Ограничение частоты и конкурентности дорогих некэшируемых маршрутов.
+
+Правила задаются в app.config['RATE_LIMITS'] по имени представления:
+
+    RATE_LIMITS = {
+        'search': {'rate': 0.5, 'burst': 10, 'concurrency': 2},
+    }
+
+* ``rate``/``burst`` — token bucket на клиента (IP из X-Forwarded-For с
+  учётом RATE_LIMIT_PROXY_COUNT доверенных прокси); при исчерпании —
+  429 с Retry-After;
+* ``concurrency`` — сколько запросов к маршруту одновременно могут
+  обрабатываться на всём хосте (то есть сколько sync-воркеров он может
+  занять); сверх этого — 503 с Retry-After.
+
+Правило проверяется в before_request, а у представлений с декоратором
+``on_cache_miss`` (под декоратором кэша страниц) — только при промахе
+кэша: ответ из кэша дёшев, и за него не списывается токен, иначе клиенты
+за общим NAT получали бы 429 на закэшированный поиск.
+
+RATE_LIMIT_PROXY_COUNT должен совпадать с числом прокси перед
+приложением. Адрес клиента берётся как N-й справа из X-Forwarded-For, и
+если прокси на самом деле меньше (например, приложение открыто напрямую,
+а RATE_LIMIT_PROXY_COUNT=1), клиент сам пишет этот заголовок и выбирает
+себе любой бакет. Поэтому по умолчанию 0 (remote_addr), а запуск за
+прокси (start_server.sh, деплой в .replit) явно задаёт 1.
+
+Состояние лежит в общем для воркеров файле, отображённом через mmap
+(RATE_LIMIT_SHM_PATH, по умолчанию в /dev/shm): хеш-таблица бакетов с
+открытой адресацией и слоты "аренды" для конкурентности. Доступ
+сериализуется flock (дескриптор открывается заново в каждом процессе после
+fork) и локом потоков. Аренда с истёкшим сроком или от умершего процесса
+считается свободной, так что упавший воркер не занимает слот навсегда.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, request
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+import metrics
+
+MAGIC = b'BLOGLIM1'
+BUCKETS = 4096
+BUCKET = struct.Struct('<Qdd')  # хеш ключа, токены, время пополнения
+PROBES = 8
+ROUTE_ROWS = 32
+LEASE_SLOTS = 64
+ROUTE_KEY = struct.Struct('<Q')
+LEASE = struct.Struct('<Id')  # pid, срок аренды
+
+_BUCKETS_OFFSET = len(MAGIC)
+_LEASES_OFFSET = _BUCKETS_OFFSET + BUCKETS * BUCKET.size
+_ROW_SIZE = ROUTE_KEY.size + LEASE_SLOTS * LEASE.size
+SIZE = _LEASES_OFFSET + ROUTE_ROWS * _ROW_SIZE
+
+
+def _hash(*parts):
+    digest = hashlib.blake2b('\0'.join(parts).encode(), digest_size=8)
+    # 0 означает пустой слот
+    return int.from_bytes(digest.digest(), 'little') or 1
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedState:
+    """Token buckets and concurrency leases in a host-shared mmap file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._pid = None
+        self._fd = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        # После fork нужен свой дескриптор: flock на унаследованном не
+        # разделяет процессы между собой
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != SIZE or os.pread(
+                    fd, len(MAGIC), 0) != MAGIC:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, SIZE)
+                os.pwrite(fd, MAGIC, 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._map = mmap.mmap(fd, SIZE)
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield self._map
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def take(self, key, rate, burst, now=None):
+        """Take one token from bucket ``key``; return 0 or seconds to wait."""
+        now = time.time() if now is None else now
+        key_hash = _hash(key)
+        with self._locked() as mem:
+            slot = self._find_bucket(mem, key_hash)
+            offset = _BUCKETS_OFFSET + slot * BUCKET.size
+            stored, tokens, updated = BUCKET.unpack_from(mem, offset)
+            if stored != key_hash:
+                tokens, updated = float(burst), now
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            if tokens >= 1.0:
+                BUCKET.pack_into(mem, offset, key_hash, tokens - 1.0, now)
+                return 0.0
+            BUCKET.pack_into(mem, offset, key_hash, tokens, now)
+            return (1.0 - tokens) / rate if rate > 0 else 60.0
+
+    def _find_bucket(self, mem, key_hash):
+        start = key_hash % BUCKETS
+        oldest, oldest_time = start, None
+        for i in range(PROBES):
+            slot = (start + i) % BUCKETS
+            stored, _, updated = BUCKET.unpack_from(
+                mem, _BUCKETS_OFFSET + slot * BUCKET.size)
+            if stored == key_hash or stored == 0:
+                return slot
+            if oldest_time is None or updated < oldest_time:
+                oldest, oldest_time = slot, updated
+        # Вытесняем самый давно не пополнявшийся бакет: он почти наверняка
+        # полон, то есть ничего не теряем
+        return oldest
+
+    def acquire(self, route, limit, ttl, now=None):
+        """Claim one of ``limit`` concurrency slots of ``route``; return the slot or None."""
+        now = time.time() if now is None else now
+        pid = os.getpid()
+        route_hash = _hash(route)
+        with self._locked() as mem:
+            row = self._find_row(mem, route_hash)
+            if row is None:
+                return None
+            base = _LEASES_OFFSET + row * _ROW_SIZE + ROUTE_KEY.size
+            for slot in range(min(limit, LEASE_SLOTS)):
+                offset = base + slot * LEASE.size
+                holder, expires = LEASE.unpack_from(mem, offset)
+                if holder == 0 or expires < now or not _pid_alive(holder):
+                    LEASE.pack_into(mem, offset, pid, now + ttl)
+                    return (row, slot)
+        return None
+
+    def release(self, lease):
+        row, slot = lease
+        offset = (_LEASES_OFFSET + row * _ROW_SIZE + ROUTE_KEY.size +
+                  slot * LEASE.size)
+        with self._locked() as mem:
+            holder, _ = LEASE.unpack_from(mem, offset)
+            if holder == os.getpid():
+                LEASE.pack_into(mem, offset, 0, 0.0)
+
+    def _find_row(self, mem, route_hash):
+        start = route_hash % ROUTE_ROWS
+        for i in range(ROUTE_ROWS):
+            row = (start + i) % ROUTE_ROWS
+            offset = _LEASES_OFFSET + row * _ROW_SIZE
+            (stored, ) = ROUTE_KEY.unpack_from(mem, offset)
+            if stored == route_hash:
+                return row
+            if stored == 0:
+                ROUTE_KEY.pack_into(mem, offset, route_hash)
+                return row
+        return None
+
+
+_state = None
+
+
+def client_id():
+    """Client address, trusting RATE_LIMIT_PROXY_COUNT proxies in X-Forwarded-For."""
+    count = current_app.config['RATE_LIMIT_PROXY_COUNT']
+    route = request.access_route
+    if count and len(route) >= count:
+        return route[-count]
+    return request.remote_addr or 'unknown'
+
+
+def _check():
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'limited_on_cache_miss', False):
+        return
+    _enforce()
+
+
+def _enforce():
+    rule = current_app.config['RATE_LIMITS'].get(request.endpoint)
+    if not rule:
+        return
+    if rule.get('rate'):
+        wait = _state.take(f'{request.endpoint}:{client_id()}', rule['rate'],
+                           rule.get('burst', 1))
+        if wait:
+            metrics.incr('limiter.throttled')
+            raise TooManyRequests(retry_after=max(1, int(wait + 0.999)))
+    if rule.get('concurrency'):
+        lease = _state.acquire(request.endpoint, rule['concurrency'],
+                               current_app.config['RATE_LIMIT_LEASE_TTL'])
+        if lease is None:
+            metrics.incr('limiter.shed')
+            raise ServiceUnavailable(retry_after=rule.get('retry_after', 2))
+        g.limiter_lease = lease
+
+
+def on_cache_miss(view):
+    """Apply the endpoint's rule only when ``view`` actually runs.
+
+    Put it below the page cache decorator: cache hits are cheap and are
+    neither charged to the client's bucket nor hold a concurrency slot.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        _enforce()
+        return view(*args, **kwargs)
+
+    wrapper.limited_on_cache_miss = True
+    return wrapper
+
+
+def _release(exception=None):
+    lease = g.pop('limiter_lease', None)
+    if lease is not None:
+        _state.release(lease)
+
+
+def init_app(app):
+    global _state
+    app.config.setdefault('RATE_LIMITS', {
+        'search': {'rate': 0.5, 'burst': 10, 'concurrency': 2},
+        'search_suggest': {'rate': 10, 'burst': 40},
+    })
+    app.config.setdefault('RATE_LIMIT_PROXY_COUNT', 0)
+    # Дольше timeout воркера Gunicorn: к этому моменту воркер уже убит
+    app.config.setdefault('RATE_LIMIT_LEASE_TTL', 150.0)
+    app.config.setdefault(
+        'RATE_LIMIT_SHM_PATH',
+        os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else
+                     app.instance_path, f'blog-limiter-{os.getuid()}'))
+    _state = SharedState(app.config['RATE_LIMIT_SHM_PATH'])
+    app.before_request(_check)
+    app.teardown_request(_release)
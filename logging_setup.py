@@ -0,0 +1,156 @@
+"""
+Неблокирующая подсистема логирования.
+
+Поток запроса только кладёт LogRecord в ограниченную очередь; форматирование
+(включая %-подстановку аргументов и JSON-сериализацию) и запись в stdout
+выполняются фоновым потоком QueueListener. При переполнении очереди записи
+отбрасываются, а не блокируют запрос.
+
+Настройка через переменные окружения:
+
+    LOG_LEVEL               уровень корневого логгера (по умолчанию INFO)
+    LOG_LEVELS              уровни по модулям: "routes=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_DEBUG_SAMPLE_RATE   доля пропускаемых DEBUG-записей, 0..1 (по умолчанию 1.0)
+    LOG_FORMAT              "json" (JSON lines, по умолчанию) или "text"
+    LOG_QUEUE_SIZE          размер очереди (по умолчанию 10000)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] [%(name)s:%(lineno)d] %(message)s'
+
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single JSON line."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created,
+                                         timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Passes only a ``rate`` share of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks, never formats and survives fork().
+
+    Gunicorn с --preload настраивает логирование в мастере, а поток
+    QueueListener не переживает fork. Поэтому обработчик запоминает PID и при
+    первой записи в новом процессе создаёт себе свежую очередь и слушателя.
+    """
+
+    def __init__(self, target_handlers, maxsize):
+        self.target_handlers = target_handlers
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize))
+        self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = logging.handlers.QueueListener(
+                self.queue, *self.target_handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+    def prepare(self, record):
+        # Форматирование откладывается до фонового потока. Запись уходит в
+        # очередь как есть, поэтому аргументы логирования не должны
+        # изменяться после вызова logger.*().
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Install the queue-backed handler on the root logger (idempotent)."""
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    if os.environ.get('LOG_FORMAT', 'json').lower() == 'text':
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
+    else:
+        formatter = JsonFormatter()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    _handler = AsyncQueueHandler(
+        [stream_handler], int(os.environ.get('LOG_QUEUE_SIZE', 10000)))
+    _handler.addFilter(
+        DebugSampler(float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+    for name, level in _parse_levels(os.environ.get('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+    atexit.register(_handler.stop)
+    return _handler
@@ -26,9 +26,7 @@ def safe_log(level, message):
         finally:
             _logging_in_progress.release()
 
-# Настройка логирования
-logging.basicConfig(level=logging.DEBUG, 
-                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Логирование уже настроено при импорте app (см. logging_setup)
 
 # Улучшенный обработчик сигналов для предотвращения зависаний
 def handle_signal(signum, frame):
@@ -0,0 +1,37 @@
+"""
+Простые счётчики запросов внутри процесса.
+
+Счётчики у каждого воркера свои (как и SimpleCache); /admin/metrics
+показывает значения обслужившего воркера вместе с его pid.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+
+_counters = Counter()
+_lock = threading.Lock()
+_started = time.time()
+
+
+def incr(name, amount=1):
+    """Increase counter ``name`` by ``amount``."""
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """Return a copy of the counters with process information."""
+    with _lock:
+        counters = dict(sorted(_counters.items()))
+    return {
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - _started, 1),
+        'counters': counters,
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
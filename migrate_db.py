@@ -61,6 +61,13 @@ def migrate_database():
                 db.session.execute(alter_sql)
                 logging.info("meta_keywords column length changed.")
             
+            # 4. Индексы для keyset-пагинации таблицы статей в админке
+            for column in ('created_at', 'updated_at', 'title'):
+                db.session.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_article_{column} "
+                    f"ON article ({column})"))
+            logging.info("Article grid indexes created/verified.")
+            
             # Фиксируем изменения
             db.session.commit()
             logging.info("All database schema changes applied successfully.")
@@ -1,7 +1,6 @@
 from datetime import datetime
 from app import db
 from flask_login import UserMixin
-from slugify import slugify
 
 # Association table for many-to-many relationships
 article_tags = db.Table(
@@ -36,9 +35,14 @@ class Category(db.Model):
 
     def __init__(self, *args, **kwargs):
         if 'slug' not in kwargs:
+            from slugify import slugify
             kwargs['slug'] = slugify(kwargs.get('name', ''))
         super(Category, self).__init__(*args, **kwargs)
 
+    @property
+    def published_count(self):
+        return self.articles.filter_by(published=True).count()
+
     def __repr__(self):
         return f'<Category {self.name}>'
 
@@ -51,6 +55,7 @@ class Tag(db.Model):
 
     def __init__(self, *args, **kwargs):
         if 'slug' not in kwargs:
+            from slugify import slugify
             kwargs['slug'] = slugify(kwargs.get('name', ''))
         super(Tag, self).__init__(*args, **kwargs)
 
@@ -61,14 +66,15 @@ class Tag(db.Model):
 class Article(db.Model):
     __tablename__ = 'article'
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(120), nullable=False)
+    title = db.Column(db.String(120), nullable=False, index=True)
     slug = db.Column(db.String(140), unique=True, nullable=False)
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime,
                            default=datetime.utcnow,
-                           onupdate=datetime.utcnow)
+                           onupdate=datetime.utcnow,
+                           index=True)
     published = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
@@ -82,8 +88,81 @@ class Article(db.Model):
 
     def __init__(self, *args, **kwargs):
         if 'slug' not in kwargs:
+            from slugify import slugify
             kwargs['slug'] = slugify(kwargs.get('title', ''))
         super(Article, self).__init__(*args, **kwargs)
 
     def __repr__(self):
         return f'<Article {self.title}>'
+
+
+class ArticleStats(db.Model):
+    __tablename__ = 'article_stats'
+    # Пишется пачками из page_views.flush(), а не через сессию запроса
+    article_id = db.Column(db.Integer,
+                           db.ForeignKey('article.id', ondelete='CASCADE'),
+                           primary_key=True)
+    views = db.Column(db.BigInteger, nullable=False, default=0, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArticleStats {self.article_id}: {self.views}>'
+
+
+class TagCooccurrence(db.Model):
+    __tablename__ = 'tag_cooccurrence'
+    # Сколько опубликованных статей несут оба тега; хранится в обе стороны,
+    # чтобы связанные теги читались одним проходом по индексу tag_id.
+    # Поддерживается дельтами в tag_stats.py
+    __table_args__ = (db.Index('ix_tag_cooccurrence_rank', 'tag_id',
+                               'articles'), )
+    tag_id = db.Column(db.Integer,
+                       db.ForeignKey('tag.id', ondelete='CASCADE'),
+                       primary_key=True)
+    related_tag_id = db.Column(db.Integer,
+                               db.ForeignKey('tag.id', ondelete='CASCADE'),
+                               primary_key=True)
+    articles = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TagCooccurrence {self.tag_id}-{self.related_tag_id}: {self.articles}>'
+
+
+class TagCategoryCount(db.Model):
+    __tablename__ = 'tag_category_count'
+    # Сколько опубликованных статей с тегом лежит в категории (tag_stats.py)
+    __table_args__ = (db.Index('ix_tag_category_count_rank', 'tag_id',
+                               'articles'), )
+    tag_id = db.Column(db.Integer,
+                       db.ForeignKey('tag.id', ondelete='CASCADE'),
+                       primary_key=True)
+    category_id = db.Column(db.Integer,
+                            db.ForeignKey('category.id', ondelete='CASCADE'),
+                            primary_key=True)
+    articles = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TagCategoryCount {self.tag_id}-{self.category_id}: {self.articles}>'
+
+
+class ArticleRevision(db.Model):
+    __tablename__ = 'article_revision'
+    __table_args__ = (db.UniqueConstraint('article_id', 'number'), )
+    # Содержимое — сжатый zlib снимок или дельта к предыдущей ревизии
+    # (см. revisions.py); строки article остаются компактными
+    id = db.Column(db.Integer, primary_key=True)
+    article_id = db.Column(db.Integer,
+                           db.ForeignKey('article.id', ondelete='CASCADE'),
+                           nullable=False,
+                           index=True)
+    number = db.Column(db.Integer, nullable=False)
+    is_snapshot = db.Column(db.Boolean, nullable=False, default=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    title = db.Column(db.String(120), nullable=False)
+    summary = db.Column(db.Text)
+    content_length = db.Column(db.Integer, nullable=False, default=0)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArticleRevision {self.article_id}#{self.number}>'
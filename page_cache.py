@@ -0,0 +1,163 @@
+"""
+Ключи кэша страниц с учётом строки запроса.
+
+``@cache.cached`` по умолчанию строит ключ только из пути, поэтому
+``/?page=2`` получал тело первой страницы. Здесь ключ — путь плюс
+нормализованный белый список параметров:
+
+* ``page`` — целое, первая страница без параметра (ключ как раньше);
+* ``q`` — в нижнем регистре, пробелы схлопнуты;
+* ``exact`` — флаг поиска без исправления опечаток.
+
+Остальные параметры (utm_*, _profile, мусор ботов) в ключ не попадают, и
+``/?utm_source=x`` отдаётся из того же кэша, что и ``/``. По той же
+причине шаблоны берут адрес страницы (og:url, JSON-LD) из ``page_url()``,
+а не из ``request.url``: иначе мусор первого посетителя попал бы в кэш.
+
+Чтобы случайные строки запроса не вытеснили кэш, у каждого пути не больше
+CACHE_MAX_VARIANTS_PER_PATH закэшированных вариантов (у /search —
+CACHE_MAX_SEARCH_VARIANTS). Сверх лимита страница рендерится без кэша,
+пока старые варианты не истекут; счётчик page_cache.variants_rejected.
+
+Профилируемый запрос (см. profiler.py) кэш обходит и не пополняет: иначе
+профиль закэшированной страницы показал бы только чтение из кэша.
+Учёт вариантов у каждого воркера свой, как и сам кэш страниц, и ограничен
+MAX_TRACKED_PATHS путями (LRU), чтобы случайные пути не раздували память.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import g, request, url_for
+
+from app import app, cache
+import metrics
+
+# Длиннее — не кэшируем: такие ключи почти никогда не повторяются
+MAX_VARIANT_LENGTH = 256
+# Сколько путей учитывается; давно не запрошенные забываются первыми
+MAX_TRACKED_PATHS = 10000
+
+_variants = OrderedDict()  # путь -> {вариант: истекает}, по давности
+_lock = threading.Lock()
+
+
+def normalize_query(query):
+    """Lowercase ``query`` and collapse runs of whitespace."""
+    return ' '.join(query.lower().split())
+
+
+def _params():
+    args = request.args
+    params = {}
+    page = args.get('page', 1, type=int)
+    if page != 1:
+        params['page'] = page
+    query = normalize_query(args.get('q', ''))
+    if query:
+        params['q'] = query
+    if args.get('exact'):
+        params['exact'] = 1
+    return params
+
+
+def variant():
+    """Return the normalized, whitelisted query string of the request."""
+    return urlencode(_params())
+
+
+def make_key(*args, **kwargs):
+    key = f'view/{request.path}'
+    query = variant()
+    return f'{key}?{query}' if query else key
+
+
+@app.template_global()
+def page_url():
+    """Absolute URL of the current page as its cache entry sees it.
+
+    Pages cached by query variant get the normalized variant appended;
+    other pages get the bare path, so junk query strings never end up in
+    cached HTML.
+    """
+    url = request.url_root.rstrip('/') + request.path
+    query = variant() if g.get('page_cache_query') else ''
+    return f'{url}?{query}' if query else url
+
+
+@app.template_global()
+def page_link(page):
+    """URL of ``page`` of the current listing, keeping whitelisted params."""
+    params = _params()
+    params.pop('page', None)
+    if page != 1:
+        params['page'] = page
+    return url_for(request.endpoint, **request.view_args, **params)
+
+
+def bypass():
+    """True if the request must skip the page cache (it is being profiled)."""
+    if g.get('profile') is None:
+        return False
+    metrics.incr('page_cache.bypassed')
+    return True
+
+
+def _admit(path, query, timeout, limit):
+    now = time.monotonic()
+    with _lock:
+        known = _variants.get(path)
+        if known is None:
+            known = _variants[path] = {}
+            while len(_variants) > MAX_TRACKED_PATHS:
+                _variants.popitem(last=False)
+        else:
+            _variants.move_to_end(path)
+        if known.get(query, 0) > now:
+            return True
+        # Истёкшие варианты вычищаются при каждой вставке, а не только у
+        # лимита: иначе каждый путь держал бы их до reset()
+        for stale in [v for v, expires in known.items() if expires <= now]:
+            del known[stale]
+        if len(known) >= limit:
+            return False
+        known[query] = now + timeout
+        return True
+
+
+def cached(timeout, limit_config='CACHE_MAX_VARIANTS_PER_PATH'):
+    """Like ``cache.cached`` but keyed on the normalized query string.
+
+    At most ``app.config[limit_config]`` query variants of one path are
+    cached at a time; requests for further variants are rendered uncached.
+    """
+
+    def unless():
+        g.page_cache_query = True
+        if bypass():
+            return True
+        query = variant()
+        if not query:
+            return False
+        if (len(query) <= MAX_VARIANT_LENGTH and _admit(
+                request.path, query, timeout, app.config[limit_config])):
+            return False
+        metrics.incr('page_cache.variants_rejected')
+        return True
+
+    return cache.cached(timeout=timeout,
+                        make_cache_key=make_key,
+                        unless=unless,
+                        response_filter=_cacheable)
+
+
+def _cacheable(rv):
+    # Отказы лимитера (429, 503) временные и относятся к одному клиенту
+    return getattr(rv, 'status_code', 200) not in (429, 503)
+
+
+def reset():
+    with _lock:
+        _variants.clear()
@@ -0,0 +1,166 @@
+"""
+Счётчики просмотров статей с агрегацией в памяти воркера.
+
+Просмотр считается в after_request (ответ 200 на представление ``article``,
+в том числе из кэша страниц, кроме запросов прогрева кэша) одним инкрементом словаря, без обращения к БД.
+Фоновый поток воркера раз в VIEW_FLUSH_INTERVAL секунд сбрасывает
+накопленное в таблицу article_stats одним пакетным upsert (executemany),
+на отдельном соединении, мимо сессии запроса. Остаток сбрасывается при
+выходе воркера (gunicorn worker_exit и atexit).
+
+Если сброс не удался, инкременты возвращаются в буфер и уйдут со
+следующей попыткой.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import bindparam, desc, select, update
+
+from app import app, db
+from cache_warmer import WARM_HEADER
+from models import Article, ArticleStats
+import metrics
+
+logger = logging.getLogger(__name__)
+
+COUNTED_ENDPOINTS = frozenset(('article', ))
+
+
+class ViewCounter:
+    """Per-process slug -> views buffer with a background flusher."""
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+
+    def hit(self, slug):
+        with self._lock:
+            self._pending[slug] += 1
+        self._ensure_flusher()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def _ensure_flusher(self):
+        # После fork поток родителя в воркере не существует: запускаем свой
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+        threading.Thread(target=self._run,
+                         args=(self._stop, ),
+                         name='page-views-flush',
+                         daemon=True).start()
+
+    def _run(self, stop):
+        interval = app.config['VIEW_FLUSH_INTERVAL']
+        while not stop.wait(interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered views to article_stats; return the number of slugs written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+            if not batch:
+                return 0
+            try:
+                with app.app_context():
+                    _upsert(batch)
+            except Exception as e:
+                logger.warning("Page view flush failed, keeping %d slugs: %s",
+                               len(batch), e)
+                with self._lock:
+                    self._pending.update(batch)
+                return 0
+            metrics.incr('page_views.flushes')
+            metrics.incr('page_views.flushed', sum(batch.values()))
+            return len(batch)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+counter = ViewCounter()
+
+
+def _upsert(batch):
+    now = datetime.utcnow()
+    params = [{
+        'b_slug': slug,
+        'b_views': views,
+        'b_now': now
+    } for slug, views in batch.items()]
+    table = ArticleStats.__table__
+    rows = select(Article.id, bindparam('b_views'),
+                  bindparam('b_now')).where(Article.slug == bindparam('b_slug'))
+
+    with db.engine.begin() as conn:
+        dialect = conn.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).from_select(
+                ['article_id', 'views', 'updated_at'], rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.article_id],
+                set_={
+                    'views': table.c.views + stmt.excluded.views,
+                    'updated_at': stmt.excluded.updated_at,
+                })
+            conn.execute(stmt, params)
+        else:
+            # Без ON CONFLICT: UPDATE существующих, затем INSERT недостающих
+            article_id = select(Article.id).where(
+                Article.slug == bindparam('b_slug')).scalar_subquery()
+            conn.execute(
+                update(table).where(table.c.article_id == article_id).values(
+                    views=table.c.views + bindparam('b_views'),
+                    updated_at=bindparam('b_now')), params)
+            missing = rows.where(~select(table.c.article_id).where(
+                table.c.article_id == Article.id).exists())
+            conn.execute(
+                table.insert().from_select(
+                    ['article_id', 'views', 'updated_at'], missing), params)
+
+
+def most_viewed(limit=10, since=None):
+    """Return (Article, views) pairs of published articles, most viewed first.
+
+    ``since`` keeps only counters updated after that datetime.
+    """
+    stmt = select(Article, ArticleStats.views).join(
+        ArticleStats, ArticleStats.article_id == Article.id).where(
+            Article.published.is_(True))
+    if since is not None:
+        stmt = stmt.where(ArticleStats.updated_at >= since)
+    stmt = stmt.order_by(desc(ArticleStats.views), desc(Article.id))
+    return db.session.execute(stmt.limit(limit)).all()
+
+
+@app.after_request
+def count_article_view(response):
+    if (request.endpoint in COUNTED_ENDPOINTS and request.method == 'GET'
+            and response.status_code == 200
+            and WARM_HEADER not in request.headers):
+        counter.hit(request.view_args['slug'])
+    return response
+
+
+atexit.register(counter.stop)
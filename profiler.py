@@ -0,0 +1,327 @@
+"""
+Профилирование отдельного запроса по требованию администратора.
+
+Запрос профилируется, если:
+
+* в нём есть подписанный токен — параметр ``?_profile=<токен>`` или
+  заголовок X-Profile (токен выдаёт /admin/profiles, действует
+  PROFILE_TOKEN_MAX_AGE секунд);
+* или он попал в выборку 1 из PROFILE_SAMPLE_RATE (0 — выключено).
+
+Во время такого запроса фоновый поток раз в PROFILE_INTERVAL секунд снимает
+стек потока запроса (статистический профилировщик), а события SQLAlchemy и
+сигналы Flask записывают время каждого SQL-запроса и рендера шаблона.
+Профиль сохраняется JSON-файлом в PROFILE_DIR (хранятся последние
+PROFILE_KEEP), /admin/profiles показывает список и flame graph.
+
+Остальные запросы платят одной проверкой параметра и заголовка; обработчики
+SQL и шаблонов без активного профиля сразу возвращаются.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request, template_rendered, before_render_template
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PARAM = '_profile'
+TOKEN_HEADER = 'X-Profile'
+ID_HEADER = 'X-Profile-Id'
+MAX_SQL_LENGTH = 500
+MAX_DEPTH = 128
+
+_local = threading.local()
+
+
+def _serializer():
+    return URLSafeTimedSerializer(app.secret_key, salt='request-profiler')
+
+
+def make_token():
+    """Return a signed token that enables profiling for its bearer."""
+    return _serializer().dumps('profile')
+
+
+def _token_valid(token):
+    try:
+        _serializer().loads(token, max_age=app.config['PROFILE_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return False
+    return True
+
+
+def _trigger():
+    token = request.args.get(TOKEN_PARAM) or request.headers.get(TOKEN_HEADER)
+    if token:
+        return 'token' if _token_valid(token) else None
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() * rate < 1:
+        return 'sample'
+    return None
+
+
+class Sampler:
+    """Collect collapsed stacks of one thread at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name='request-profiler',
+                                        daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < MAX_DEPTH:
+                code = frame.f_code
+                names.append(f'{code.co_name} '
+                             f'({os.path.basename(code.co_filename)}:'
+                             f'{code.co_firstlineno})')
+                frame = frame.f_back
+            names.reverse()
+            self.stacks[';'.join(names)] += 1
+
+
+class Profile:
+
+    def __init__(self, trigger):
+        self.id = f'{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.created_at = datetime.utcnow()
+        self.sql = []
+        self.templates = []
+        self.status = None
+        self._sql_started = None
+        self._template_started = {}
+        self.sampler = Sampler(threading.get_ident(),
+                               app.config['PROFILE_INTERVAL'])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'created_at': self.created_at.isoformat(),
+            'trigger': self.trigger,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': self.status,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000,
+                                 3),
+            'interval_ms': self.sampler.interval * 1000,
+            'samples': dict(self.sampler.stacks),
+            'sql': self.sql,
+            'templates': self.templates,
+        }
+
+
+def _active():
+    return getattr(_local, 'profile', None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    profile = _active()
+    if profile is not None:
+        profile._sql_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    profile = _active()
+    if profile is not None and profile._sql_started is not None:
+        profile.sql.append({
+            'statement': statement[:MAX_SQL_LENGTH],
+            'ms': round((time.perf_counter() - profile._sql_started) * 1000,
+                        3),
+        })
+        profile._sql_started = None
+
+
+def _before_render(sender, template, context, **extra):
+    profile = _active()
+    if profile is not None:
+        profile._template_started[template.name] = time.perf_counter()
+
+
+def _rendered(sender, template, context, **extra):
+    profile = _active()
+    if profile is not None:
+        started = profile._template_started.pop(template.name, None)
+        if started is not None:
+            profile.templates.append({
+                'name': template.name,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+before_render_template.connect(_before_render, app)
+template_rendered.connect(_rendered, app)
+
+
+def _start():
+    trigger = _trigger()
+    if trigger is None:
+        return
+    profile = Profile(trigger)
+    _local.profile = g.profile = profile
+    profile.sampler.start()
+
+
+def _annotate(response):
+    profile = g.get('profile')
+    if profile is not None:
+        profile.status = response.status_code
+        response.headers[ID_HEADER] = profile.id
+    return response
+
+
+def _finish(exception=None):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    _local.profile = None
+    profile.sampler.stop()
+    try:
+        save(profile.to_dict())
+    except OSError as e:
+        logger.warning("Saving profile %s failed: %s", profile.id, e)
+
+
+def _directory():
+    return app.config['PROFILE_DIR']
+
+
+def save(data):
+    directory = _directory()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{data['id']}.json")
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    _prune(directory)
+    logger.info("Saved profile %s for %s (%.1f ms)", data['id'],
+                data['path'], data['duration_ms'])
+
+
+def _prune(directory):
+    names = sorted(n for n in os.listdir(directory) if n.endswith('.json'))
+    for name in names[:-app.config['PROFILE_KEEP']]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles():
+    """Return summaries of the saved profiles, newest first."""
+    directory = _directory()
+    try:
+        names = sorted(
+            (n for n in os.listdir(directory) if n.endswith('.json')),
+            reverse=True)
+    except FileNotFoundError:
+        return []
+    summaries = []
+    for name in names:
+        data = load(name[:-len('.json')])
+        if data is None:
+            continue
+        summaries.append({
+            'id': data['id'],
+            'created_at': data['created_at'],
+            'trigger': data['trigger'],
+            'method': data['method'],
+            'path': data['path'],
+            'status': data['status'],
+            'duration_ms': data['duration_ms'],
+            'sql_count': len(data['sql']),
+            'sql_ms': round(sum(q['ms'] for q in data['sql']), 3),
+        })
+    return summaries
+
+
+def load(profile_id):
+    if not profile_id or os.path.basename(profile_id) != profile_id:
+        return None
+    try:
+        with open(os.path.join(_directory(), f'{profile_id}.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def flame_graph(samples, min_width=0.2):
+    """Lay out collapsed stacks as flame graph boxes.
+
+    Returns (boxes, depth) where each box is a dict with ``label``,
+    ``depth``, ``left`` and ``width`` (in percent) and ``samples``.
+    Boxes narrower than ``min_width`` percent are dropped.
+    """
+    root = {'children': {}, 'count': 0}
+    for stack, count in samples.items():
+        node = root
+        node['count'] += count
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {
+                'children': {},
+                'count': 0
+            })
+            node['count'] += count
+    total = root['count']
+    boxes = []
+    if not total:
+        return boxes, 0
+
+    def walk(node, depth, left):
+        for name, child in sorted(node['children'].items()):
+            width = child['count'] * 100.0 / total
+            if width >= min_width:
+                boxes.append({
+                    'label': name,
+                    'depth': depth,
+                    'left': left,
+                    'width': width,
+                    'samples': child['count'],
+                })
+                walk(child, depth + 1, left)
+            left += width
+
+    walk(root, 0, 0.0)
+    return boxes, max(box['depth'] for box in boxes) + 1 if boxes else 0
+
+
+# Первым в цепочке, чтобы профиль охватывал остальные before_request
+app.before_request_funcs.setdefault(None, []).insert(0, _start)
+app.after_request(_annotate)
+app.teardown_request(_finish)
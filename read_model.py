@@ -0,0 +1,202 @@
+"""
+Read model опубликованного контента в памяти процесса (опционально,
+READ_MODEL_ENABLED=1).
+
+Содержит метаданные опубликованных статей (без полного текста), словарь
+slug -> статья, категории с числом статей, теги со списками статей и
+готовые упорядоченные списки для главной, категорий и тегов. Записи — объекты
+со ``__slots__`` с теми же атрибутами, что читают шаблоны, поэтому
+представления отдают списки без запросов к БД.
+
+С ``--preload`` модель строится в мастере Gunicorn (when_ready) до fork,
+после чего gc.freeze() убирает её из сборщика мусора, и воркеры делят
+страницы памяти copy-on-write. Каждый воркер сверяет модель со штампом
+versions.CONTENT (один stat()) и при изменении контента пересобирает свою
+копию: пять узких запросов.
+"""
+
+import logging
+import threading
+
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import func, select
+
+from app import db
+from db_routing import use_primary
+from models import Article, Category, Tag, User, article_tags
+import versions
+
+logger = logging.getLogger(__name__)
+
+# Для статей без summary шаблоны показывают начало content
+EXCERPT_LENGTH = 1000
+
+
+class AuthorRecord:
+    __slots__ = ('id', 'username')
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+
+class CategoryRecord:
+    __slots__ = ('id', 'name', 'slug', 'description', 'articles')
+
+    def __init__(self, id, name, slug, description):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.description = description
+        self.articles = []
+
+    @property
+    def published_count(self):
+        return len(self.articles)
+
+
+class TagRecord:
+    __slots__ = ('id', 'name', 'slug', 'articles')
+
+    def __init__(self, id, name, slug):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.articles = []
+
+
+class ArticleRecord:
+    __slots__ = ('id', 'title', 'slug', 'summary', 'content', 'created_at',
+                 'updated_at', 'category', 'author', 'tags')
+    published = True
+
+    def __init__(self, id, title, slug, summary, content, created_at,
+                 updated_at, category, author):
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.summary = summary
+        self.content = content
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.category = category
+        self.author = author
+        self.tags = []
+
+
+class ListPagination(Pagination):
+    """Flask-SQLAlchemy pagination over an in-memory list."""
+
+    def _query_items(self):
+        items = self._query_args['items']
+        return items[self._query_offset:self._query_offset + self.per_page]
+
+    def _query_count(self):
+        return len(self._query_args['items'])
+
+
+class ReadModel:
+
+    def __init__(self, version, articles, categories, tags):
+        self.version = version
+        # Все списки уже упорядочены: статьи по created_at desc
+        self.articles = articles
+        self.categories = categories
+        self.tags = tags
+        self.articles_by_slug = {a.slug: a for a in articles}
+        self.categories_by_slug = {c.slug: c for c in categories}
+        self.tags_by_slug = {t.slug: t for t in tags}
+
+    @staticmethod
+    def paginate(items, page, per_page=5):
+        return ListPagination(page=page, per_page=per_page, items=items)
+
+
+def build():
+    """Load the read model for the current content version."""
+    version = versions.get_version(versions.CONTENT)
+    with use_primary():
+        return _build(version)
+
+
+def _build(version):
+    # Только с основной БД: данные помечаются новой версией и живут до
+    # следующего изменения контента, отставшая реплика закрепила бы старые
+    session = db.session
+
+    categories = [
+        CategoryRecord(*row) for row in session.execute(
+            select(Category.id, Category.name, Category.slug,
+                   Category.description).order_by(Category.id))
+    ]
+    categories_by_id = {c.id: c for c in categories}
+    tags = [
+        TagRecord(*row) for row in session.execute(
+            select(Tag.id, Tag.name, Tag.slug).order_by(Tag.id))
+    ]
+    tags_by_id = {t.id: t for t in tags}
+    authors = {
+        id_: AuthorRecord(id_, username)
+        for id_, username in session.execute(select(User.id, User.username))
+    }
+
+    published = Article.published.is_(True)
+    articles = []
+    for row in session.execute(
+            select(Article.id, Article.title, Article.slug, Article.summary,
+                   func.substr(Article.content, 1, EXCERPT_LENGTH),
+                   Article.created_at, Article.updated_at,
+                   Article.category_id, Article.user_id).where(
+                       published).order_by(Article.created_at.desc(),
+                                           Article.id.desc())):
+        category = categories_by_id.get(row.category_id)
+        article = ArticleRecord(row.id, row.title, row.slug, row.summary,
+                                None if row.summary else row[4],
+                                row.created_at, row.updated_at, category,
+                                authors.get(row.user_id))
+        articles.append(article)
+        if category is not None:
+            category.articles.append(article)
+
+    articles_by_id = {a.id: a for a in articles}
+    for article_id, tag_id in session.execute(
+            select(article_tags.c.article_id, article_tags.c.tag_id).join(
+                Article, Article.id == article_tags.c.article_id).where(
+                    published).order_by(article_tags.c.tag_id)):
+        article = articles_by_id[article_id]
+        tag = tags_by_id[tag_id]
+        article.tags.append(tag)
+        tag.articles.append(article)
+    for tag in tags:
+        tag.articles.sort(key=lambda a: (a.created_at, a.id), reverse=True)
+
+    logger.info("Read model built: %d articles, %d categories, %d tags",
+                len(articles), len(categories), len(tags))
+    return ReadModel(version, articles, categories, tags)
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def load():
+    """Build the model now (e.g. in the Gunicorn master before fork)."""
+    global _current
+    _current = build()
+    return _current
+
+
+def get():
+    """Return an up-to-date read model, or None when the feature is off."""
+    global _current
+    if not current_app.config['READ_MODEL_ENABLED']:
+        return None
+    version = versions.get_version(versions.CONTENT)
+    model = _current
+    if model is None or model.version != version:
+        with _lock:
+            model = _current
+            if model is None or model.version != version:
+                model = _current = build()
+    return model
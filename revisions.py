@@ -0,0 +1,148 @@
+"""
+История правок статей в отдельной таблице article_revision.
+
+Каждое сохранение — ревизия с номером 1, 2, ... Каждая SNAPSHOT_EVERY-я
+ревизия (1, 1 + N, ...) хранит полный текст, остальные — построчную дельту
+к предыдущей: список операций "скопировать строки i:j предыдущей версии"
+и "вставить строки". И снимки, и дельты сжаты zlib.
+
+Восстановление версии: ближайший снимок не новее нужной ревизии плюс не
+больше SNAPSHOT_EVERY - 1 дельт, то есть ограниченная работа и два
+запроса. Заголовок и summary небольшие и хранятся в ревизии как есть.
+"""
+
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from sqlalchemy import func, select
+
+from app import db
+from models import ArticleRevision
+
+SNAPSHOT_EVERY = 10
+COMPRESSION_LEVEL = 6
+
+
+def _pack(obj):
+    return zlib.compress(
+        json.dumps(obj, separators=(',', ':'),
+                   ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def make_delta(old, new):
+    """Encode ``new`` as line operations against ``old``."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old, ops):
+    """Rebuild the text encoded by make_delta() from ``old``."""
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+
+def latest_number(article_id):
+    return db.session.scalar(
+        select(func.max(ArticleRevision.number)).where(
+            ArticleRevision.article_id == article_id)) or 0
+
+
+def record(article, previous=None, user_id=None):
+    """Add a revision for the current state of ``article`` to the session.
+
+    ``previous`` is the (title, summary, content) tuple before this save;
+    its content is the base of the delta and, for articles without history
+    yet, the whole tuple is stored as revision 1. Pass None for a new
+    article. Returns the new revision, or None when nothing changed.
+    """
+    content = article.content or ''
+    current = (article.title, article.summary, content)
+    if previous is not None and tuple(previous) == current:
+        return None
+
+    number = latest_number(article.id)
+    if number == 0 and previous is not None:
+        # История началась раньше этого модуля: сохраняем исходное состояние
+        old_title, old_summary, old_content = previous
+        _add(article.id, 1, _pack(old_content or ''), True, old_title,
+             old_summary, len(old_content or ''), user_id)
+        number = 1
+
+    number += 1
+    if previous is None or (number - 1) % SNAPSHOT_EVERY == 0:
+        data, is_snapshot = _pack(content), True
+    else:
+        data = _pack(make_delta(previous[2] or '', content))
+        is_snapshot = False
+    return _add(article.id, number, data, is_snapshot, article.title,
+                article.summary, len(content), user_id)
+
+
+def _add(article_id, number, data, is_snapshot, title, summary,
+         content_length, user_id):
+    revision = ArticleRevision(article_id=article_id,
+                               number=number,
+                               is_snapshot=is_snapshot,
+                               data=data,
+                               title=title,
+                               summary=summary,
+                               content_length=content_length,
+                               user_id=user_id)
+    db.session.add(revision)
+    return revision
+
+
+def list_revisions(article_id):
+    """Return revision metadata (without payloads), newest first."""
+    return db.session.execute(
+        select(ArticleRevision.number, ArticleRevision.title,
+               ArticleRevision.is_snapshot, ArticleRevision.content_length,
+               func.length(ArticleRevision.data).label('stored_bytes'),
+               ArticleRevision.user_id, ArticleRevision.created_at).where(
+                   ArticleRevision.article_id == article_id).order_by(
+                       ArticleRevision.number.desc())).all()
+
+
+def reconstruct(article_id, number):
+    """Return (revision, content) for revision ``number``, or None if missing."""
+    snapshot = db.session.scalar(
+        select(func.max(ArticleRevision.number)).where(
+            ArticleRevision.article_id == article_id,
+            ArticleRevision.is_snapshot.is_(True),
+            ArticleRevision.number <= number))
+    if snapshot is None:
+        return None
+    chain = db.session.scalars(
+        select(ArticleRevision).where(
+            ArticleRevision.article_id == article_id,
+            ArticleRevision.number.between(snapshot, number)).order_by(
+                ArticleRevision.number)).all()
+    if not chain or chain[-1].number != number:
+        return None
+    content = _unpack(chain[0].data)
+    for revision in chain[1:]:
+        if revision.is_snapshot:
+            content = _unpack(revision.data)
+        else:
+            content = apply_delta(content, _unpack(revision.data))
+    return chain[-1], content
+
@@ -10,21 +10,24 @@ from functools import wraps
 from flask import render_template, request, redirect, url_for, flash, abort, jsonify, make_response, session
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
-from sqlalchemy import desc
-from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, BooleanField, SelectField, HiddenField
-from wtforms.validators import DataRequired
-
-from app import app, db, cache
-from models import User, Category, Tag, Article
-from utils import generate_sitemap
-
-# Настройка логирования с форматированием для отслеживания времени и контекста
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] [%(name)s:%(lineno)d] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    stream=sys.stdout)
+from sqlalchemy import desc, func
+
+from app import app, db, cache, fragment_cache
+from models import User, Category, Tag, Article, article_tags
+from utils import invalidate_content
+from db_routing import read_replica
+from spelling import suggest_correction
+import bulk_actions
+import crawler_files
+import limiter
+import metrics
+import page_cache
+import profiler
+import read_model
+import revisions
+import tag_stats
+
+# Логирование настраивается в logging_setup (очередь + фоновый поток)
 logger = logging.getLogger(__name__)
 
 
@@ -33,24 +36,20 @@ def log_execution_time(func):
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger.debug(f"START: {func.__name__}")
+        logger.debug("START: %s", func.__name__)
         start_time = time.time()
         try:
             result = func(*args, **kwargs)
             end_time = time.time()
             execution_time = end_time - start_time
-            logger.debug(
-                f"END: {func.__name__} - Execution time: {execution_time:.2f} sec"
-            )
+            logger.debug("END: %s - Execution time: %.2f sec", func.__name__,
+                         execution_time)
             return result
         except Exception as e:
             end_time = time.time()
             execution_time = end_time - start_time
-            logger.error(
-                f"ERROR in {func.__name__} - Execution time: {execution_time:.2f} sec"
-            )
-            logger.error(f"Exception: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception("ERROR in %s - Execution time: %.2f sec: %s",
+                             func.__name__, execution_time, e)
             raise
 
     return wrapper
@@ -71,12 +70,18 @@ def admin_required(f):
 
 # Public routes
 @app.route('/')
-@cache.cached(timeout=60)
+@read_replica
+@page_cache.cached(timeout=60)
 def index():
     page = request.args.get('page', 1, type=int)
-    articles = Article.query.filter_by(published=True).order_by(
-        desc(Article.created_at)).paginate(page=page, per_page=5)
-    categories = Category.query.all()
+    model = read_model.get()
+    if model is not None:
+        articles = model.paginate(model.articles, page)
+        categories = model.categories
+    else:
+        articles = Article.query.filter_by(published=True).order_by(
+            desc(Article.created_at)).paginate(page=page, per_page=5)
+        categories = Category.query.all()
     return render_template('index.html',
                            articles=articles,
                            categories=categories,
@@ -84,8 +89,13 @@ def index():
 
 
 @app.route('/blog/<slug>')
-@cache.cached(timeout=60)
+@read_replica
+@cache.cached(timeout=60, unless=page_cache.bypass)
 def article(slug):
+    # Read model знает все опубликованные slug: неизвестный — 404 без запроса
+    model = read_model.get()
+    if model is not None and slug not in model.articles_by_slug:
+        abort(404)
     article = Article.query.filter_by(slug=slug, published=True).first_or_404()
 
     # Создание хлебных крошек
@@ -105,14 +115,21 @@ def article(slug):
 
 
 @app.route('/category/<slug>')
-@cache.cached(timeout=60)
+@read_replica
+@page_cache.cached(timeout=60)
 def category(slug):
-    category = Category.query.filter_by(slug=slug).first_or_404()
     page = request.args.get('page', 1, type=int)
-    articles = Article.query.filter_by(
-        category=category,
-        published=True).order_by(desc(Article.created_at)).paginate(page=page,
-                                                                    per_page=5)
+    model = read_model.get()
+    if model is not None:
+        category = model.categories_by_slug.get(slug) or abort(404)
+        articles = model.paginate(category.articles, page)
+        categories = model.categories
+    else:
+        category = Category.query.filter_by(slug=slug).first_or_404()
+        articles = Article.query.filter_by(
+            category=category, published=True).order_by(
+                desc(Article.created_at)).paginate(page=page, per_page=5)
+        categories = Category.query.all()
 
     # Создание хлебных крошек
     breadcrumbs = [('Home', url_for('index')),
@@ -120,6 +137,7 @@ def category(slug):
 
     return render_template('category.html',
                            category=category,
+                           categories=categories,
                            articles=articles,
                            breadcrumbs=breadcrumbs,
                            title=f"Category: {category.name}",
@@ -128,12 +146,18 @@ def category(slug):
 
 
 @app.route('/tag/<slug>')
-@cache.cached(timeout=60)
+@read_replica
+@page_cache.cached(timeout=60)
 def tag(slug):
-    tag = Tag.query.filter_by(slug=slug).first_or_404()
     page = request.args.get('page', 1, type=int)
-    articles = tag.articles.filter_by(published=True).order_by(
-        desc(Article.created_at)).paginate(page=page, per_page=5)
+    model = read_model.get()
+    if model is not None:
+        tag = model.tags_by_slug.get(slug) or abort(404)
+        articles = model.paginate(tag.articles, page)
+    else:
+        tag = Tag.query.filter_by(slug=slug).first_or_404()
+        articles = tag.articles.filter_by(published=True).order_by(
+            desc(Article.created_at)).paginate(page=page, per_page=5)
 
     # Создание хлебных крошек
     breadcrumbs = [('Home', url_for('index')), (f"Tag: {tag.name}", '')]
@@ -146,19 +170,38 @@ def tag(slug):
                            description=f"Articles tagged with {tag.name}.")
 
 
+def _search_articles(query, page):
+    return Article.query.filter(
+        Article.published == True,
+        (Article.title.ilike(f'%{query}%')
+         | Article.content.ilike(f'%{query}%')
+         | Article.summary.ilike(f'%{query}%'))).order_by(
+             desc(Article.created_at)).paginate(page=page, per_page=5)
+
+
 @app.route('/search')
+@read_replica
+@page_cache.cached(timeout=60, limit_config='CACHE_MAX_SEARCH_VARIANTS')
+@limiter.on_cache_miss
 def search():
-    query = request.args.get('q', '')
+    # Тот же вид запроса, что и в ключе кэша: одна страница на все написания
+    query = page_cache.normalize_query(request.args.get('q', ''))
     if not query:
         return redirect(url_for('index'))
 
     page = request.args.get('page', 1, type=int)
-    articles = Article.query.filter(
-        Article.published == True,
-        (Article.title.ilike(f'%{query}%')
-         | Article.content.ilike(f'%{query}%')
-         | Article.summary.ilike(f'%{query}%'))).order_by(
-             desc(Article.created_at)).paginate(page=page, per_page=5)
+    articles = _search_articles(query, page)
+
+    # Ноль результатов: пробуем исправить опечатку по словарю корпуса и,
+    # если исправленный запрос что-то находит, показываем его результаты
+    original_query = None
+    if (articles.total == 0 and page == 1
+            and not request.args.get('exact')):
+        correction = suggest_correction(query)
+        if correction:
+            corrected = _search_articles(correction, page)
+            if corrected.total:
+                original_query, query, articles = query, correction, corrected
 
     categories = Category.query.all()
 
@@ -170,6 +213,7 @@ def search():
         articles=articles,
         categories=categories,
         search_query=query,
+        original_query=original_query,
         breadcrumbs=breadcrumbs,
         title=f"Search: {query}",
         description=
@@ -225,45 +269,149 @@ def logout():
 @login_required
 @admin_required
 def admin_dashboard():
+    from admin_api import dashboard_stats
+    from page_views import most_viewed
+
     logger.debug("Entering admin_dashboard route")
     try:
-        articles_count = Article.query.count()
-        logger.debug(f"articles_count: {articles_count}")
-        published_count = Article.query.filter_by(published=True).count()
-        logger.debug(f"published_count: {published_count}")
-        draft_count = articles_count - published_count
-        categories_count = Category.query.count()
-        logger.debug(f"categories_count: {categories_count}")
-        tags_count = Tag.query.count()
-        logger.debug(f"tags_count: {tags_count}")
+        stats = dashboard_stats()
+        logger.debug("dashboard stats: %s", stats)
         recent_articles = Article.query.order_by(desc(
             Article.created_at)).limit(5).all()
-        logger.debug(f"recent_articles count: {len(recent_articles)}")
+        logger.debug("recent_articles count: %s", len(recent_articles))
+        popular_articles = most_viewed(5)
     except Exception as ex:
-        logger.error(f"Error in admin_dashboard queries: {ex}")
+        logger.error("Error in admin_dashboard queries: %s", ex)
         raise
 
     return render_template('admin/dashboard.html',
-                           articles_count=articles_count,
-                           published_count=published_count,
-                           draft_count=draft_count,
-                           categories_count=categories_count,
-                           tags_count=tags_count,
+                           **stats,
                            recent_articles=recent_articles,
+                           popular_articles=popular_articles,
                            title="Admin Dashboard")
 
 
+@app.route('/admin/metrics')
+@login_required
+@admin_required
+def admin_metrics():
+    # Счётчики и кэши воркера, обслужившего запрос (см. metrics.py)
+    data = metrics.snapshot()
+    data['caches'] = {
+        name: backend.stats()
+        for name, backend in (('page', cache.cache),
+                              ('fragment', fragment_cache.cache))
+        if hasattr(backend, 'stats')
+    }
+    if app.config['SLUG_FILTER_ENABLED']:
+        import slug_filter
+        data['slug_filter'] = slug_filter.stats()
+    return jsonify(data)
+
+
+@app.route('/admin/profiles')
+@login_required
+@admin_required
+def admin_profiles():
+    return render_template('admin/profiles.html',
+                           profiles=profiler.list_profiles(),
+                           token=profiler.make_token(),
+                           token_param=profiler.TOKEN_PARAM,
+                           token_max_age=app.config['PROFILE_TOKEN_MAX_AGE'],
+                           sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+                           title="Request Profiles")
+
+
+@app.route('/admin/profiles/<profile_id>')
+@login_required
+@admin_required
+def admin_profile(profile_id):
+    profile = profiler.load(profile_id)
+    if profile is None:
+        abort(404)
+    boxes, depth = profiler.flame_graph(profile['samples'])
+    return render_template('admin/profile.html',
+                           profile=profile,
+                           boxes=boxes,
+                           depth=depth,
+                           slow_queries=sorted(profile['sql'],
+                                               key=lambda q: q['ms'],
+                                               reverse=True)[:20],
+                           title=f"Profile: {profile['path']}")
+
+
 @app.route('/admin/articles')
 @login_required
 @admin_required
 def admin_articles():
-    articles = Article.query.order_by(desc(Article.created_at)).all()
+    # Строки таблицы подгружает admin.js из /admin/api/articles
     return render_template('admin/dashboard.html',
-                           articles=articles,
+                           categories=Category.query.all(),
+                           tags=Tag.query.all(),
                            section="articles",
                            title="Manage Articles")
 
 
+# Действие -> (текст для сообщения, затронутые зависимости фрагментов)
+BULK_ARTICLE_ACTIONS = {
+    'publish': ('published', ('categories', 'tags')),
+    'unpublish': ('moved to drafts', ('categories', 'tags')),
+    'delete': ('deleted', ('categories', 'tags')),
+    'recategorize': ('recategorized', ('categories', )),
+    'add_tag': ('tagged', ('tags', )),
+    'remove_tag': ('untagged', ('tags', )),
+}
+
+
+@app.route('/admin/articles/bulk', methods=['POST'])
+@login_required
+@admin_required
+@log_execution_time
+def bulk_articles():
+    """Применяет одно действие к набору статей в одной транзакции."""
+    action = request.form.get('action')
+    article_ids = [
+        int(i) for i in request.form.getlist('article_ids') if i.isdigit()
+    ]
+
+    if action not in BULK_ARTICLE_ACTIONS:
+        flash('Unknown bulk action.', 'danger')
+        return redirect(url_for('admin_articles'))
+    if not article_ids:
+        flash('Select at least one article.', 'warning')
+        return redirect(url_for('admin_articles'))
+
+    try:
+        if action == 'publish':
+            count = bulk_actions.publish(article_ids)
+        elif action == 'unpublish':
+            count = bulk_actions.unpublish(article_ids)
+        elif action == 'delete':
+            count = bulk_actions.delete_articles(article_ids)
+        elif action == 'recategorize':
+            category_id = request.form.get('category_id', type=int)
+            if category_id is not None:
+                Category.query.get_or_404(category_id)
+            count = bulk_actions.recategorize(article_ids, category_id)
+        else:
+            tag = Tag.query.get_or_404(request.form.get('tag_id', type=int))
+            if action == 'add_tag':
+                count = bulk_actions.add_tag(article_ids, tag.id)
+            else:
+                count = bulk_actions.remove_tag(article_ids, tag.id)
+
+        label, deps = BULK_ARTICLE_ACTIONS[action]
+        db.session.commit()
+        invalidate_content(*deps)
+        flash(f'{count} article(s) {label}.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Bulk action %s failed: %s", action, e)
+        flash(f'Error applying bulk action: {str(e)}', 'danger')
+
+    return redirect(url_for('admin_articles'))
+
+
 @app.route('/admin/article/new', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -308,13 +456,13 @@ def new_article():
             if not slug or slug == '-':
                 slug = f"post-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
 
-            logger.debug(f"Checking slug uniqueness: {slug}")
+            logger.debug("Checking slug uniqueness: %s", slug)
             base_slug = slug
             counter = 1
             while Article.query.filter_by(slug=slug).first():
                 slug = f"{base_slug}-{counter}"
                 counter += 1
-                logger.debug(f"Created new slug: {slug}")
+                logger.debug("Created new slug: %s", slug)
 
             meta_title = (request.form.get('meta_title', '').strip()
                           or title)[:200]
@@ -334,9 +482,10 @@ def new_article():
             logger.debug("Adding article to session")
             db.session.add(article)
             db.session.flush()
+            revisions.record(article, user_id=current_user.id)
 
             if new_tags_str:
-                logger.debug(f"Processing tags: {new_tags_str}")
+                logger.debug("Processing tags: %s", new_tags_str)
                 tag_names = [
                     t.strip() for t in new_tags_str.split(',') if t.strip()
                 ]
@@ -352,17 +501,17 @@ def new_article():
                         db.session.flush()
                     article.tags.append(tag)
 
+            tag_stats.update(None, [article.id])
             logger.debug("Committing changes to database")
             db.session.commit()
-            cache.clear()
-            generate_sitemap()
+            invalidate_content('categories', 'tags')
 
             flash('Статья успешно создана!', 'success')
             return redirect(url_for('article', slug=article.slug))
 
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error creating article: {str(e)}")
+            logger.error("Error creating article: %s", e)
             flash(f'Ошибка при создании статьи: {str(e)}', 'danger')
             return render_template('admin/edit_article.html',
                                    form=form,
@@ -399,7 +548,7 @@ def edit_article(article_id):
 
     if request.method == 'POST' and form.validate_on_submit():
         try:
-            logger.debug(f"Starting article edit process for ID: {article_id}")
+            logger.debug("Starting article edit process for ID: %s", article_id)
             title = request.form.get('title', '').strip()
             if not title:
                 flash('Заголовок обязателен!', 'danger')
@@ -412,6 +561,12 @@ def edit_article(article_id):
                     is_edit=True,
                     title=f"Редактирование: {article.title}")
 
+            # Запоминаем то, от чего зависят фрагменты сайдбаров
+            old_state = (article.category_id, article.published,
+                         {t.id for t in article.tags})
+            previous = (article.title, article.summary, article.content)
+            tag_counts_before = tag_stats.snapshot([article.id])
+
             article.title = title
             article.content = request.form.get('content', '').strip()
             article.summary = request.form.get('summary', '').strip()
@@ -424,7 +579,7 @@ def edit_article(article_id):
                 if not new_slug or new_slug == '-':
                     new_slug = f"post-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
 
-                logger.debug(f"Checking uniqueness for new slug: {new_slug}")
+                logger.debug("Checking uniqueness for new slug: %s", new_slug)
                 base_slug = new_slug
                 counter = 1
                 test_slug = new_slug
@@ -432,7 +587,7 @@ def edit_article(article_id):
                                            Article.id != article.id).first():
                     test_slug = f"{base_slug}-{counter}"
                     counter += 1
-                    logger.debug(f"Created new slug: {test_slug}")
+                    logger.debug("Created new slug: %s", test_slug)
 
                 article.slug = test_slug
 
@@ -447,7 +602,7 @@ def edit_article(article_id):
 
             new_tags_str = request.form.get('new_tags', '').strip()
             if new_tags_str:
-                logger.debug(f"Processing tags: {new_tags_str}")
+                logger.debug("Processing tags: %s", new_tags_str)
                 tag_names = [
                     t.strip() for t in new_tags_str.split(',') if t.strip()
                 ]
@@ -463,17 +618,27 @@ def edit_article(article_id):
                         db.session.flush()
                     article.tags.append(tag)
 
+            revisions.record(article, previous, current_user.id)
+            tag_stats.update(tag_counts_before, [article.id])
             logger.debug("Committing changes to database")
             db.session.commit()
-            cache.clear()
-            generate_sitemap()
+
+            old_category_id, old_published, old_tag_ids = old_state
+            deps = []
+            if (str(old_category_id or '') != str(article.category_id or '')
+                    or old_published != article.published):
+                deps.append('categories')
+            if (old_tag_ids != {t.id for t in article.tags}
+                    or old_published != article.published):
+                deps.append('tags')
+            invalidate_content(*deps)
 
             flash('Статья успешно обновлена!', 'success')
             return redirect(url_for('article', slug=article.slug))
 
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error updating article: {str(e)}")
+            logger.error("Error updating article: %s", e)
             flash(f'Ошибка при обновлении статьи: {str(e)}', 'danger')
             return render_template('admin/edit_article.html',
                                    form=form,
@@ -499,10 +664,10 @@ def edit_article(article_id):
 def delete_article(article_id):
     article = Article.query.get_or_404(article_id)
     try:
-        db.session.delete(article)
+        # Вместе со связями, счётчиками и историей правок
+        bulk_actions.delete_articles([article.id])
         db.session.commit()
-        cache.clear()
-        generate_sitemap()
+        invalidate_content('categories', 'tags')
         flash('Article deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -511,6 +676,52 @@ def delete_article(article_id):
     return redirect(url_for('admin_articles'))
 
 
+@app.route('/admin/article/<int:article_id>/revisions')
+@login_required
+@admin_required
+def article_revisions(article_id):
+    article = Article.query.get_or_404(article_id)
+    number = request.args.get('number', type=int)
+    selected = None
+    if number:
+        selected = revisions.reconstruct(article.id, number)
+        if selected is None:
+            abort(404)
+    return render_template('admin/revisions.html',
+                           article=article,
+                           revisions=revisions.list_revisions(article.id),
+                           selected=selected,
+                           title=f"Revisions: {article.title}")
+
+
+@app.route('/admin/article/<int:article_id>/revisions/<int:number>/restore',
+           methods=['POST'])
+@login_required
+@admin_required
+@log_execution_time
+def restore_revision(article_id, number):
+    article = Article.query.get_or_404(article_id)
+    found = revisions.reconstruct(article.id, number)
+    if found is None:
+        abort(404)
+    revision, content = found
+    try:
+        previous = (article.title, article.summary, article.content)
+        article.title = revision.title
+        article.summary = revision.summary
+        article.content = content
+        revisions.record(article, previous, current_user.id)
+        db.session.commit()
+        invalidate_content()
+        flash(f'Revision #{number} restored.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Restoring revision %s of article %s failed: %s",
+                     number, article_id, e)
+        flash(f'Error restoring revision: {str(e)}', 'danger')
+    return redirect(url_for('article_revisions', article_id=article_id))
+
+
 @app.route('/admin/categories', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -531,6 +742,7 @@ def manage_categories():
                 db.session.add(category)
                 try:
                     db.session.commit()
+                    invalidate_content('categories')
                     flash('Category created successfully!', 'success')
                 except Exception as e:
                     db.session.rollback()
@@ -551,6 +763,7 @@ def manage_categories():
 
             try:
                 db.session.commit()
+                invalidate_content('categories')
                 flash('Category updated successfully!', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -567,6 +780,7 @@ def manage_categories():
                 db.session.delete(category)
                 try:
                     db.session.commit()
+                    invalidate_content('categories')
                     flash('Category deleted successfully!', 'success')
                 except Exception as e:
                     db.session.rollback()
@@ -598,6 +812,7 @@ def manage_tags():
                 db.session.add(tag)
                 try:
                     db.session.commit()
+                    invalidate_content('tags')
                     flash('Tag created successfully!', 'success')
                 except Exception as e:
                     db.session.rollback()
@@ -616,6 +831,7 @@ def manage_tags():
 
             try:
                 db.session.commit()
+                invalidate_content('tags')
                 flash('Tag updated successfully!', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -624,40 +840,61 @@ def manage_tags():
         elif action == 'delete':
             tag_id = request.form.get('tag_id')
             tag = Tag.query.get_or_404(tag_id)
+            article_ids = [a.id for a in tag.articles.with_entities(Article.id)]
+            tag_counts_before = tag_stats.snapshot(article_ids)
 
             db.session.delete(tag)
             try:
+                tag_stats.update(tag_counts_before, article_ids)
                 db.session.commit()
+                invalidate_content('tags')
                 flash('Tag deleted successfully!', 'success')
             except Exception as e:
                 db.session.rollback()
                 flash(f'Error deleting tag: {str(e)}', 'danger')
 
+        elif action == 'merge':
+            target = Tag.query.get_or_404(
+                request.form.get('target_tag_id', type=int))
+            source_ids = [
+                int(i) for i in request.form.getlist('source_tag_ids')
+                if i.isdigit()
+            ]
+
+            try:
+                merged = bulk_actions.merge_tags(source_ids, target.id)
+                db.session.commit()
+                if merged:
+                    invalidate_content('tags')
+                flash(f'{merged} tag(s) merged into "{target.name}".',
+                      'success')
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error merging tags: {str(e)}', 'danger')
+
         return redirect(url_for('manage_tags'))
 
+    # Количество статей по тегам одним GROUP BY вместо count() на каждый тег
+    tag_counts = dict(
+        db.session.query(article_tags.c.tag_id,
+                         func.count(article_tags.c.article_id)).group_by(
+                             article_tags.c.tag_id).all())
+
     return render_template('admin/manage_tags.html',
                            tags=tags,
+                           tag_counts=tag_counts,
                            title="Manage Tags")
 
 
 @app.route('/sitemap.xml')
 def sitemap_xml():
-    response = make_response(open('static/sitemap.xml').read())
-    response.headers["Content-Type"] = "application/xml"
-    return response
+    return crawler_files.sitemap.serve()
 
 
 @app.route('/robots.txt')
 def robots_txt():
-    with open('static/robots.txt') as f:
-        content = f.read()
-
     site_url = os.environ.get('SITE_URL', request.url_root.rstrip('/'))
-    content = content.replace('{{site_url}}', site_url)
-
-    response = make_response(content)
-    response.headers["Content-Type"] = "text/plain"
-    return response
+    return crawler_files.robots.serve(site_url)
 
 
 @app.route('/admin/clear-cache')
@@ -666,6 +903,7 @@ def robots_txt():
 def clear_cache():
     logger.info("Clearing cache...")
     cache.clear()
+    page_cache.reset()
     flash('Cache cleared successfully!', 'success')
     return redirect(request.referrer or url_for('admin_dashboard'))
 
@@ -0,0 +1,226 @@
+"""
+Отрицательный кэш slug: фильтр Блума существующих статей, категорий и тегов.
+
+Боты и битые ссылки запрашивают /blog/<slug>, /category/<slug>,
+/tag/<slug> (и их ленты) с несуществующими slug; такие запросы проходят мимо
+кэша страниц и идут в БД ради 404. Перед вызовом представления slug
+проверяется по фильтру Блума; если его там точно нет — 404 без обращения к
+БД. Ложноположительные ответы фильтра (не больше SLUG_FILTER_FP_RATE)
+просто доходят до представления, как раньше.
+
+Фильтр строится на версию контента (штамп versions.CONTENT сдвигается при
+любом создании, переименовании и удалении) и сохраняется в
+SLUG_FILTER_DIR файлом ``slugs-<версия>.bloom``. Первый воркер, увидевший
+новую версию, строит фильтр тремя запросами slug и пишет файл атомарно,
+остальные читают готовый файл. На запрос приходится один stat() штампа и
+k хешей.
+
+Счётчики в /admin/metrics: slug_filter.rejected (404 без БД),
+slug_filter.passed, slug_filter.false_positives (фильтр пропустил, а
+представление ответило 404).
+"""
+
+import glob
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+
+from flask import abort, g, request
+from sqlalchemy import select
+
+from app import app, db
+from models import Article, Category, Tag
+import metrics
+import versions
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SLUGBLM1'
+HEADER = struct.Struct('<QBQ')  # бит, хешей, элементов
+KEEP_FILES = 3
+
+# Представление -> пространство slug, которое оно ищет
+SLUG_ENDPOINTS = {
+    'article': 'article',
+    'category': 'category',
+    'category_feed': 'category',
+    'tag': 'tag',
+    'tag_feed': 'tag',
+}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over str keys (double hashing on blake2b)."""
+
+    def __init__(self, bits, hashes, items=0, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.items = items
+        self.data = bytearray(data) if data is not None else bytearray(
+            (bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, fp_rate):
+        capacity = max(1, capacity)
+        bits = max(64, int(-capacity * math.log(fp_rate) / math.log(2)**2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+        self.items += 1
+
+    def __contains__(self, key):
+        data = self.data
+        return all(data[pos >> 3] & (1 << (pos & 7))
+                   for pos in self._positions(key))
+
+    def false_positive_rate(self):
+        """Expected false positive rate for the items added so far."""
+        return (1 - math.exp(-self.hashes * self.items / self.bits))**self.hashes
+
+    def to_bytes(self):
+        return MAGIC + HEADER.pack(self.bits, self.hashes,
+                                   self.items) + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        if raw[:len(MAGIC)] != MAGIC:
+            raise ValueError('not a slug filter file')
+        bits, hashes, items = HEADER.unpack_from(raw, len(MAGIC))
+        data = raw[len(MAGIC) + HEADER.size:]
+        if len(data) != (bits + 7) // 8:
+            raise ValueError('truncated slug filter file')
+        return cls(bits, hashes, items, data)
+
+
+def _key(kind, slug):
+    return f'{kind}:{slug}'
+
+
+def _all_keys():
+    # Только с основной БД: реплика может отставать на REPLICA_MAX_LAG, и
+    # фильтр без нового slug (ложноотрицательный ответ) отдавал бы 404 на
+    # него всем воркерам до следующего изменения контента
+    keys = [
+        _key('article', slug) for slug in db.session.scalars(
+            select(Article.slug).where(Article.published.is_(True)))
+    ]
+    keys += [
+        _key('category', slug)
+        for slug in db.session.scalars(select(Category.slug))
+    ]
+    keys += [_key('tag', slug) for slug in db.session.scalars(select(Tag.slug))]
+    return keys
+
+
+def build():
+    keys = _all_keys()
+    # Запас по ёмкости: фильтр живёт до следующей версии контента
+    bloom = BloomFilter.for_capacity(
+        len(keys) + 100, app.config['SLUG_FILTER_FP_RATE'])
+    for key in keys:
+        bloom.add(key)
+    return bloom
+
+
+def _path(version):
+    return os.path.join(app.config['SLUG_FILTER_DIR'], f'slugs-{version}.bloom')
+
+
+def _save(bloom, version):
+    directory = app.config['SLUG_FILTER_DIR']
+    os.makedirs(directory, exist_ok=True)
+    path = _path(version)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(bloom.to_bytes())
+    os.replace(tmp_path, path)
+    stale = sorted(glob.glob(os.path.join(directory, 'slugs-*.bloom')),
+                   key=os.path.getmtime)[:-KEEP_FILES]
+    for old in stale:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+
+
+def _load(version):
+    try:
+        with open(_path(version), 'rb') as f:
+            return BloomFilter.from_bytes(f.read())
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning("Ignoring slug filter for version %s: %s", version, e)
+        return None
+
+
+_current = None  # (version, BloomFilter)
+_lock = threading.Lock()
+
+
+def get():
+    """Return the Bloom filter for the current content version."""
+    global _current
+    version = versions.get_version(versions.CONTENT)
+    current = _current
+    if current is not None and current[0] == version:
+        return current[1]
+    with _lock:
+        current = _current
+        if current is not None and current[0] == version:
+            return current[1]
+        bloom = _load(version)
+        if bloom is None:
+            bloom = build()
+            try:
+                _save(bloom, version)
+            except OSError as e:
+                logger.warning("Saving slug filter failed: %s", e)
+        _current = (version, bloom)
+        return bloom
+
+
+def might_exist(kind, slug):
+    return _key(kind, slug) in get()
+
+
+def stats():
+    bloom = get()
+    return {
+        'items': bloom.items,
+        'bits': bloom.bits,
+        'hashes': bloom.hashes,
+        'bytes': len(bloom.data),
+        'false_positive_rate': round(bloom.false_positive_rate(), 6),
+    }
+
+
+@app.before_request
+def reject_unknown_slug():
+    kind = SLUG_ENDPOINTS.get(request.endpoint)
+    if kind is None or not app.config['SLUG_FILTER_ENABLED']:
+        return
+    if not might_exist(kind, request.view_args['slug']):
+        metrics.incr('slug_filter.rejected')
+        abort(404)
+    metrics.incr('slug_filter.passed')
+    g.slug_filter_passed = True
+
+
+@app.after_request
+def count_false_positive(response):
+    if response.status_code == 404 and g.pop('slug_filter_passed', False):
+        metrics.incr('slug_filter.false_positives')
+    return response
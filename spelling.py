@@ -0,0 +1,188 @@
+"""
+Исправление опечаток для поиска без результатов ("Возможно, вы имели в виду").
+
+Словарь строится из заголовков, тегов, категорий и текста опубликованных
+статей. Поиск кандидатов — symmetric delete (как в SymSpell): для каждого
+слова словаря заранее сохраняются все варианты с удалением до MAX_DISTANCE
+символов, и запрос сводится к нескольким обращениям к dict вместо перебора
+всего словаря с расстоянием Левенштейна. Удаления считаются только по
+первым PREFIX_LENGTH символам, что ограничивает размер индекса.
+
+Индекс собирается лениво при первом поиске без результатов и
+пересобирается при сдвиге штампа versions.CONTENT. Сборка читает текст
+всех статей, поэтому идёт в фоновом потоке с основной БД: запрос, заметивший
+новую версию, не ждёт её и пользуется прежним индексом (до первой сборки
+исправлений нет).
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import select
+
+from app import app, db
+from models import Article, Category, Tag
+import versions
+
+logger = logging.getLogger(__name__)
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+MIN_WORD_LENGTH = 3
+MAX_WORD_LENGTH = 40
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return [
+        word for word in _WORD.findall((text or '').casefold())
+        if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH
+        and not word.isdigit()
+    ]
+
+
+def _deletes(word, distance):
+    """Return every string obtained from ``word`` by up to ``distance`` deletions."""
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {
+            w[:i] + w[i + 1:]
+            for w in frontier if len(w) > 1 for i in range(len(w))
+        }
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 if larger."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellIndex:
+    """Symmetric-delete index over a word -> frequency vocabulary."""
+
+    def __init__(self, counts=None):
+        self.counts = {}
+        self._deletes = {}
+        if counts:
+            self.build(counts)
+
+    def build(self, counts):
+        deletes = {}
+        for word in counts:
+            for variant in _deletes(word[:PREFIX_LENGTH], MAX_DISTANCE):
+                deletes.setdefault(variant, []).append(word)
+        self.counts = dict(counts)
+        self._deletes = deletes
+
+    def correct_word(self, word):
+        """Return the best known word within MAX_DISTANCE of ``word`` (or ``word``)."""
+        if word in self.counts or len(word) < MIN_WORD_LENGTH:
+            return word
+        # Короткие слова правим не больше чем на одну букву
+        limit = 1 if len(word) <= 4 else MAX_DISTANCE
+        best = None
+        seen = set()
+        for variant in _deletes(word[:PREFIX_LENGTH], limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance > limit:
+                    continue
+                rank = (distance, -self.counts[candidate])
+                if best is None or rank < best[0]:
+                    best = (rank, candidate)
+        return best[1] if best else word
+
+    def correct(self, query):
+        """Return ``query`` with misspelled words replaced, or None if nothing changed."""
+        words = _WORD.findall(query.casefold())
+        corrected = [self.correct_word(word) for word in words]
+        if corrected == words:
+            return None
+        return ' '.join(corrected)
+
+
+class _VersionedIndex:
+    """Spelling index of the latest content version, rebuilt in the background."""
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._building = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the newest built index (None before the first build)."""
+        version = versions.get_version(versions.CONTENT)
+        if self._version != version:
+            with self._lock:
+                if self._version != version and not self._building:
+                    self._building = True
+                    threading.Thread(target=self._rebuild,
+                                     args=(version, ),
+                                     name='spelling-index',
+                                     daemon=True).start()
+        return self._index
+
+    def _rebuild(self, version):
+        try:
+            # Свой контекст приложения: g пустой, чтение идёт с основной БД
+            with app.app_context():
+                index = SpellIndex(load_vocabulary())
+            self._index, self._version = index, version
+            logger.info("Spelling index rebuilt: %d words", len(index.counts))
+        except Exception as e:
+            logger.warning("Spelling index rebuild failed: %s", e)
+        finally:
+            with self._lock:
+                self._building = False
+
+
+_current = _VersionedIndex()
+
+
+def load_vocabulary():
+    """Count words in published titles, summaries, bodies, tags and categories."""
+    counts = Counter()
+    rows = db.session.execute(
+        select(Article.title, Article.summary,
+               Article.content).where(Article.published.is_(True)))
+    for title, summary, content in rows:
+        # Слова заголовка весят больше, чем слова текста
+        counts.update(tokenize(title) * 3)
+        counts.update(tokenize(summary))
+        counts.update(tokenize(content))
+    for (name, ) in db.session.execute(select(Tag.name)):
+        counts.update(tokenize(name) * 3)
+    for (name, ) in db.session.execute(select(Category.name)):
+        counts.update(tokenize(name) * 3)
+    return counts
+
+
+def suggest_correction(query):
+    """Return a corrected version of ``query`` from the corpus vocabulary, or None."""
+    index = _current.get()
+    return index.correct(query) if index is not None else None
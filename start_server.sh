@@ -14,7 +14,8 @@ cleanup() {
 trap cleanup SIGINT SIGTERM
 
 # Установка переменных среды для оптимизации производительности
-export GUNICORN_CMD_ARGS="--ignore-winch --preload --timeout 120 --workers 3 --max-requests 1000 --max-requests-jitter 200 --log-level info"
+# (ignore-winch задаётся в gunicorn_config.py)
+export GUNICORN_CMD_ARGS="--preload --timeout 120 --workers 3 --max-requests 1000 --max-requests-jitter 200 --log-level info"
 
 # Проверка наличия Python и Gunicorn
 if ! command -v python3 &> /dev/null; then
@@ -33,9 +34,30 @@ if [ ! -f "main.py" ]; then
     exit 1
 fi
 
+# Разовая инициализация схемы и администратора (не выполняется при импорте app)
+echo "Инициализация базы данных..."
+if ! flask --app main bootstrap; then
+    echo "Не удалось инициализировать базу данных."
+    exit 1
+fi
+
+# Предкомпиляция шаблонов в общий кэш байткода
+flask --app main precompile-templates || echo "Предкомпиляция шаблонов не удалась, продолжаем."
+
+# Read model опубликованного контента строится в мастере до fork
+# (when_ready в gunicorn_config.py) и делится воркерами; READ_MODEL_ENABLED=0
+# отключает его
+export READ_MODEL_ENABLED="${READ_MODEL_ENABLED:-1}"
+
+# Приложение стоит за одним обратным прокси: адрес клиента для лимитера
+# берётся из X-Forwarded-For (см. limiter.py)
+export RATE_LIMIT_PROXY_COUNT="${RATE_LIMIT_PROXY_COUNT:-1}"
+
 echo "Запуск Gunicorn с оптимизированной конфигурацией..."
 echo "Используются настройки: $GUNICORN_CMD_ARGS"
 echo "Сервер будет доступен по адресу: http://0.0.0.0:5000"
 
-# Запуск Gunicorn с улучшенными параметрами
-exec gunicorn --bind 0.0.0.0:5000 --reuse-port --reload main:app
\ No newline at end of file
+# Запуск Gunicorn с улучшенными параметрами. Хуки мастера и воркеров
+# (предкомпиляция, read model, прогрев кэша, сброс просмотров при выходе)
+# живут в gunicorn_config.py; --reload несовместим с --preload
+exec gunicorn -c gunicorn_config.py --bind 0.0.0.0:5000 --reuse-port main:app
\ No newline at end of file
@@ -146,13 +146,145 @@ function initArticleEditorPage() {
 function initArticlesListPage() {
   log("Инициализация страницы списка статей");
   
-  // Ничего специфичного пока не требуется
-  const articleTable = document.querySelector('.table');
+  const articleTable = document.getElementById('article-grid');
   if (articleTable) {
     log("Таблица статей найдена");
-    
-    // Можно добавить сортировку, пагинацию или фильтры в будущем
+    initArticleGrid(articleTable);
+  }
+
+  initBulkActions();
+}
+
+// Экранирование текста перед вставкой в HTML
+function escapeHtml(value) {
+  const div = document.createElement('div');
+  div.textContent = value == null ? '' : String(value);
+  return div.innerHTML;
+}
+
+// Таблица статей: фильтры, сортировка и keyset-пагинация на сервере
+function initArticleGrid(table) {
+  const apiUrl = table.dataset.apiUrl;
+  const tbody = table.querySelector('tbody');
+  const moreButton = document.getElementById('article-grid-more');
+  const emptyMessage = document.getElementById('article-grid-empty');
+  const filters = document.getElementById('article-grid-filters');
+  const csrfInput = document.querySelector('#bulk-actions-form input[name="csrf_token"]');
+  const state = { sort: 'created_at', order: 'desc', cursor: null, requestId: 0 };
+
+  function renderRow(item) {
+    const category = item.category
+      ? `<a href="${escapeHtml(item.category.url)}" class="text-decoration-none">${escapeHtml(item.category.name)}</a>`
+      : '<span class="text-muted">None</span>';
+    const status = item.published
+      ? '<span class="badge text-bg-success">Published</span>'
+      : '<span class="badge text-bg-secondary">Draft</span>';
+    const csrf = csrfInput ? `<input type="hidden" name="csrf_token" value="${escapeHtml(csrfInput.value)}">` : '';
+    return `<tr>
+      <td><input type="checkbox" class="form-check-input bulk-select" name="article_ids" value="${item.id}" form="bulk-actions-form" aria-label="Select ${escapeHtml(item.title)}"></td>
+      <td><a href="${escapeHtml(item.urls.view)}" class="text-decoration-none">${escapeHtml(item.title)}</a></td>
+      <td>${category}</td>
+      <td><small>${escapeHtml((item.created_at || '').slice(0, 10))}</small></td>
+      <td>${status}</td>
+      <td>
+        <a href="${escapeHtml(item.urls.edit)}" class="btn btn-sm btn-outline-primary me-1"><i class="fas fa-edit"></i> Edit</a>
+        <form method="post" action="${escapeHtml(item.urls.delete)}" class="d-inline">
+          ${csrf}
+          <button type="submit" class="btn btn-sm btn-outline-danger delete-confirm"><i class="fas fa-trash"></i> Delete</button>
+        </form>
+      </td>
+    </tr>`;
+  }
+
+  function load(append) {
+    const params = new URLSearchParams({ sort: state.sort, order: state.order });
+    filters.querySelectorAll('input, select').forEach(field => {
+      if (field.value) params.set(field.name, field.value.trim());
+    });
+    if (append && state.cursor) params.set('cursor', state.cursor);
+
+    // Ответы на устаревшие запросы (быстрый ввод в поиске) отбрасываем
+    const requestId = ++state.requestId;
+    fetch(`${apiUrl}?${params}`, { headers: { 'Accept': 'application/json' } })
+      .then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+      .then(data => {
+        if (requestId !== state.requestId) return;
+        const html = data.items.map(renderRow).join('');
+        if (append) {
+          tbody.insertAdjacentHTML('beforeend', html);
+        } else {
+          tbody.innerHTML = html;
+        }
+        state.cursor = data.next_cursor;
+        moreButton.classList.toggle('d-none', !state.cursor);
+        emptyMessage.classList.toggle('d-none', tbody.children.length > 0);
+        log(`Загружено статей: ${data.items.length}`, 'debug');
+      })
+      .catch(error => log(`Ошибка загрузки таблицы статей: ${error.message}`, 'error'));
+  }
+
+  let debounceTimer = null;
+  filters.addEventListener('input', function() {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(() => load(false), 250);
+  });
+  filters.addEventListener('change', () => load(false));
+
+  table.querySelectorAll('[data-sort]').forEach(link => {
+    link.addEventListener('click', function(e) {
+      e.preventDefault();
+      const sort = link.dataset.sort;
+      state.order = state.sort === sort && state.order === 'desc' ? 'asc' : 'desc';
+      state.sort = sort;
+      load(false);
+    });
+  });
+
+  moreButton.addEventListener('click', () => load(true));
+  load(false);
+}
+
+// Массовые действия над выбранными статьями
+function initBulkActions() {
+  const form = document.getElementById('bulk-actions-form');
+  if (!form) return;
+
+  const actionSelect = document.getElementById('bulk-action');
+  const selectAll = document.getElementById('bulk-select-all');
+  const checkboxes = () => document.querySelectorAll('.bulk-select');
+
+  if (selectAll) {
+    selectAll.addEventListener('change', function() {
+      checkboxes().forEach(cb => { cb.checked = selectAll.checked; });
+      log(`Выбрано статей: ${selectAll.checked ? checkboxes().length : 0}`, 'debug');
+    });
   }
+
+  // Показываем только поля, относящиеся к выбранному действию
+  actionSelect.addEventListener('change', function() {
+    form.querySelectorAll('[data-bulk-field]').forEach(field => {
+      const actions = field.dataset.bulkField.split(' ');
+      field.classList.toggle('d-none', !actions.includes(actionSelect.value));
+    });
+  });
+
+  form.addEventListener('submit', function(e) {
+    const selected = Array.from(checkboxes()).filter(cb => cb.checked).length;
+    if (selected === 0) {
+      e.preventDefault();
+      alert('Выберите хотя бы одну статью');
+      return;
+    }
+    if (actionSelect.value === 'delete' &&
+        !confirm(`Удалить выбранные статьи (${selected})? Это действие нельзя отменить.`)) {
+      e.preventDefault();
+      return;
+    }
+    log(`Массовое действие "${actionSelect.value}" для ${selected} статей`);
+  });
 }
 
 // Общая функциональность для всех страниц администратора
@@ -0,0 +1,42 @@
+// Подсказки поиска по мере набора: /search/suggest заполняет datalist
+document.addEventListener('DOMContentLoaded', function() {
+  const input = document.querySelector('input[data-suggest-url]');
+  if (!input) return;
+  const list = document.getElementById(input.getAttribute('list'));
+  const cache = new Map();
+  let timer = null;
+  let controller = null;
+
+  function render(suggestions) {
+    list.replaceChildren(...suggestions.map(s => {
+      const option = document.createElement('option');
+      option.value = s.label;
+      option.label = s.kind;
+      return option;
+    }));
+  }
+
+  input.addEventListener('input', function() {
+    const q = input.value.trim();
+    clearTimeout(timer);
+    if (q.length < 2) {
+      render([]);
+      return;
+    }
+    if (cache.has(q)) {
+      render(cache.get(q));
+      return;
+    }
+    timer = setTimeout(() => {
+      if (controller) controller.abort();
+      controller = new AbortController();
+      fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(q)}`, {signal: controller.signal})
+        .then(r => r.ok ? r.json() : {suggestions: []})
+        .then(data => {
+          cache.set(q, data.suggestions);
+          render(data.suggestions);
+        })
+        .catch(() => {});
+    }, 150);
+  });
+});
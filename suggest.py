@@ -0,0 +1,176 @@
+"""
+Подсказки поиска по мере набора (/search/suggest).
+
+Индекс живёт в памяти воркера: отсортированный список ключей
+(нормализованный хвост названия, начиная с каждого слова) и поиск префикса
+через bisect. Ключи есть для заголовков опубликованных статей, тегов и
+категорий; выдача ранжируется по популярности (для статей — просмотры из
+article_stats, для тегов и категорий — число опубликованных статей).
+
+Индекс сверяется со штампом versions.CONTENT (один stat() на запрос) и при
+его сдвиге обновляется инкрементально: из базы читаются только
+(id, название, вес), ключи пересчитываются лишь у добавленных, удалённых
+и переименованных записей. Размер ограничен MAX_ITEMS записями и
+MAX_KEYS_PER_ITEM ключами на запись. Просмотры сами по себе штамп не
+сдвигают, поэтому веса статей обновляются вместе со следующей правкой.
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left
+
+from flask import jsonify, request, url_for
+from sqlalchemy import func, select
+
+from app import app, db
+from db_routing import read_replica, use_primary
+from models import Article, ArticleStats, Category, Tag, article_tags
+import versions
+
+MIN_PREFIX = 2
+MAX_RESULTS = 8
+MAX_SCAN = 500
+MAX_ITEMS = 20000
+MAX_KEYS_PER_ITEM = 8
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase ``text`` and collapse everything but word characters."""
+    return ' '.join(_WORD.findall((text or '').casefold()))
+
+
+def _keys(label):
+    norm = normalize(label)
+    starts = [m.start() for m in _WORD.finditer(norm)][:MAX_KEYS_PER_ITEM]
+    return {norm[start:] for start in starts}
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over (kind, id) -> (label, weight)."""
+
+    def __init__(self):
+        self._entries = []  # отсортированные (ключ, kind, id)
+        self._items = {}  # (kind, id) -> (label, slug, weight)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def version(self):
+        return self._version
+
+    def sync(self, version, rows):
+        """Apply the difference between the index and ``rows`` of (kind, id, label, slug, weight)."""
+        rows = heapq.nlargest(MAX_ITEMS, rows, key=lambda row: row[4])
+        fresh = {(kind, id_): (label, slug, weight)
+                 for kind, id_, label, slug, weight in rows}
+        with self._lock:
+            removed = set()
+            added = []
+            for ident in self._items.keys() - fresh.keys():
+                removed.update(self._entries_for(ident,
+                                                 self._items.pop(ident)[0]))
+            for ident, item in fresh.items():
+                old = self._items.get(ident)
+                if old is None or old[0] != item[0]:
+                    if old is not None:
+                        removed.update(self._entries_for(ident, old[0]))
+                    added.extend(self._entries_for(ident, item[0]))
+                self._items[ident] = item
+            # Один проход фильтра и сортировка почти упорядоченного списка
+            # вместо insort/del на каждую запись
+            if removed:
+                self._entries = [e for e in self._entries if e not in removed]
+            if added:
+                self._entries.extend(added)
+                self._entries.sort()
+            self._version = version
+
+    @staticmethod
+    def _entries_for(ident, label):
+        return [(key, ) + ident for key in _keys(label)]
+
+    def lookup(self, query, limit=MAX_RESULTS):
+        """Return up to ``limit`` (kind, label, slug) tuples matching the prefix."""
+        prefix = normalize(query)
+        if len(prefix) < MIN_PREFIX:
+            return []
+        with self._lock:
+            found = {}
+            i = bisect_left(self._entries, (prefix, ))
+            end = min(len(self._entries), i + MAX_SCAN)
+            while i < end and self._entries[i][0].startswith(prefix):
+                ident = self._entries[i][1:]
+                found[ident] = self._items[ident]
+                i += 1
+        best = heapq.nsmallest(
+            limit,
+            found.items(),
+            key=lambda pair: (-pair[1][2], len(pair[1][0]), pair[1][0]))
+        return [(kind, label, slug)
+                for (kind, _), (label, slug, _) in best]
+
+
+index = SuggestIndex()
+
+
+def load_rows():
+    """Read (kind, id, label, slug, weight) for everything that can be suggested."""
+    published = Article.published.is_(True)
+    rows = [('article', id_, title, slug, views)
+            for id_, title, slug, views in db.session.execute(
+                select(Article.id, Article.title, Article.slug,
+                       func.coalesce(ArticleStats.views, 0)).outerjoin(
+                           ArticleStats,
+                           ArticleStats.article_id == Article.id).where(
+                               published))]
+    category_counts = (select(
+        Category.id, Category.name, Category.slug,
+        func.count(Article.id)).outerjoin(
+            Article, (Article.category_id == Category.id) & published).group_by(
+                Category.id, Category.name, Category.slug))
+    rows += [('category', id_, name, slug, count)
+             for id_, name, slug, count in db.session.execute(category_counts)]
+    tag_counts = (select(Tag.id, Tag.name, Tag.slug,
+                         func.count(Article.id)).outerjoin(
+                             article_tags,
+                             article_tags.c.tag_id == Tag.id).outerjoin(
+                                 Article,
+                                 (Article.id == article_tags.c.article_id)
+                                 & published).group_by(
+                                     Tag.id, Tag.name, Tag.slug))
+    rows += [('tag', id_, name, slug, count)
+             for id_, name, slug, count in db.session.execute(tag_counts)]
+    return rows
+
+
+def ensure_fresh():
+    """Bring the process-local index up to the current content version."""
+    version = versions.get_version(versions.CONTENT)
+    if index.version != version:
+        # Строки с основной БД: индекс помечается новой версией, и строки
+        # с отстающей реплики остались бы в нём до следующего сдвига
+        with use_primary():
+            rows = load_rows()
+        index.sync(version, rows)
+
+
+@app.route('/search/suggest')
+@read_replica
+def search_suggest():
+    query = request.args.get('q', '')
+    ensure_fresh()
+    suggestions = [{
+        'kind': kind,
+        'label': label,
+        # kind совпадает с именем публичного представления
+        'url': url_for(kind, slug=slug),
+    } for kind, label, slug in index.lookup(query)]
+    response = jsonify(q=query, suggestions=suggestions)
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
@@ -0,0 +1,169 @@
+"""
+Совместная встречаемость тегов и распределение тегов по категориям.
+
+Две разреженные таблицы считают только опубликованные статьи:
+
+* tag_cooccurrence (tag_id, related_tag_id) — сколько статей несут оба тега;
+* tag_category_count (tag_id, category_id) — сколько статей с тегом в
+  категории.
+
+Таблицы не пересчитываются целиком, а меняются на дельту. Перед изменением
+статей снимается их вклад (``snapshot``), после изменения (в той же
+транзакции) — вклад заново, и ``update`` применяет разность. Так одинаково
+обрабатываются правка тегов, смена категории, публикация, удаление и
+массовые операции. ``rebuild`` пересчитывает всё с нуля (flask
+rebuild-tag-stats, init-db).
+
+Сайдбар страницы тега читает обе таблицы по индексу (tag_id, articles)
+вместо обхода всех статей тега.
+"""
+
+from collections import Counter
+
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_
+from sqlalchemy.orm import aliased
+
+from app import app, db
+from models import (Article, Category, Tag, TagCategoryCount, TagCooccurrence,
+                    article_tags)
+
+SIDEBAR_LIMIT = 10
+# Ключей на один IN (...): пара тегов — два параметра, а SQLite ограничивает
+# число параметров в запросе (999 в старых сборках)
+CHUNK_SIZE = 400
+
+
+def _chunks(items):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def _pairs_query(article_ids=None):
+    other = aliased(article_tags)
+    stmt = select(article_tags.c.tag_id, other.c.tag_id,
+                  func.count()).join(
+                      other, other.c.article_id == article_tags.c.article_id
+                  ).join(Article, Article.id == article_tags.c.article_id).where(
+                      Article.published.is_(True),
+                      article_tags.c.tag_id != other.c.tag_id)
+    if article_ids is not None:
+        stmt = stmt.where(Article.id.in_(article_ids))
+    return stmt.group_by(article_tags.c.tag_id, other.c.tag_id)
+
+
+def _categories_query(article_ids=None):
+    stmt = select(article_tags.c.tag_id, Article.category_id,
+                  func.count()).join(
+                      Article, Article.id == article_tags.c.article_id).where(
+                          Article.published.is_(True),
+                          Article.category_id.is_not(None))
+    if article_ids is not None:
+        stmt = stmt.where(Article.id.in_(article_ids))
+    return stmt.group_by(article_tags.c.tag_id, Article.category_id)
+
+
+def snapshot(article_ids):
+    """Return the current contribution of ``article_ids`` to both tables."""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return Counter(), Counter()
+    db.session.flush()
+    pairs, categories = Counter(), Counter()
+    # Вклад статей независим, поэтому суммы по частям складываются
+    for chunk in _chunks(article_ids):
+        pairs.update({(a, b): n
+                      for a, b, n in db.session.execute(_pairs_query(chunk))})
+        categories.update({
+            (t, c): n
+            for t, c, n in db.session.execute(_categories_query(chunk))
+        })
+    return pairs, categories
+
+
+def update(before, article_ids):
+    """Apply the change of ``article_ids`` since the ``before`` snapshot.
+
+    ``before`` is None for articles that did not exist yet.
+    """
+    old_pairs, old_categories = before or (Counter(), Counter())
+    new_pairs, new_categories = snapshot(article_ids)
+    _apply(TagCooccurrence, TagCooccurrence.related_tag_id,
+           _diff(new_pairs, old_pairs))
+    _apply(TagCategoryCount, TagCategoryCount.category_id,
+           _diff(new_categories, old_categories))
+
+
+def _diff(new, old):
+    delta = Counter(new)
+    delta.subtract(old)
+    return {key: n for key, n in delta.items() if n}
+
+
+def _apply(model, second, delta):
+    if not delta:
+        return
+    keys = list(delta)
+    existing = set()
+    for chunk in _chunks(keys):
+        existing.update(
+            db.session.execute(
+                select(model.tag_id, second).where(
+                    tuple_(model.tag_id, second).in_(chunk))).tuples())
+    params = [{
+        'b_tag': key[0],
+        'b_other': key[1],
+        'b_delta': delta[key]
+    } for key in keys if key in existing]
+    if params:
+        table = model.__table__
+        db.session.execute(
+            table.update().where(
+                table.c.tag_id == bindparam('b_tag'),
+                table.c[second.key] == bindparam('b_other')).values(
+                    articles=table.c.articles + bindparam('b_delta')),
+            params)
+    rows = [{
+        'tag_id': key[0],
+        second.key: key[1],
+        'articles': delta[key]
+    } for key in keys if key not in existing and delta[key] > 0]
+    if rows:
+        db.session.execute(insert(model), rows)
+    db.session.execute(
+        delete(model).where(model.articles <= 0).execution_options(
+            synchronize_session=False))
+
+
+def rebuild():
+    """Recompute both tables from the articles; the caller commits."""
+    for model in (TagCooccurrence, TagCategoryCount):
+        db.session.execute(delete(model))
+    db.session.execute(
+        insert(TagCooccurrence).from_select(
+            ['tag_id', 'related_tag_id', 'articles'], _pairs_query()))
+    db.session.execute(
+        insert(TagCategoryCount).from_select(
+            ['tag_id', 'category_id', 'articles'], _categories_query()))
+
+
+@app.template_global()
+def related_tags(tag_id, limit=SIDEBAR_LIMIT):
+    """Tags most often used together with ``tag_id``, with shared article counts."""
+    return db.session.execute(
+        select(Tag, TagCooccurrence.articles).join(
+            TagCooccurrence, TagCooccurrence.related_tag_id == Tag.id).where(
+                TagCooccurrence.tag_id == tag_id).order_by(
+                    TagCooccurrence.articles.desc(),
+                    Tag.name).limit(limit)).all()
+
+
+@app.template_global()
+def tag_categories(tag_id, limit=SIDEBAR_LIMIT):
+    """Categories holding published articles with ``tag_id``, with counts."""
+    return db.session.execute(
+        select(Category, TagCategoryCount.articles).join(
+            TagCategoryCount,
+            TagCategoryCount.category_id == Category.id).where(
+                TagCategoryCount.tag_id == tag_id).order_by(
+                    TagCategoryCount.articles.desc(),
+                    Category.name).limit(limit)).all()
@@ -0,0 +1,48 @@
+"""
+Персистентный кэш байткода Jinja, общий для всех воркеров.
+
+FileSystemBytecodeCache пишет файл во временный и затем атомарно
+переименовывает его, а ключ бакета включает контрольную сумму исходника
+шаблона, поэтому несколько воркеров могут безопасно делить один каталог:
+они либо читают целый актуальный файл, либо перекомпилируют шаблон.
+"""
+
+import logging
+import os
+
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+logger = logging.getLogger(__name__)
+
+
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that creates its directory lazily and never breaks rendering."""
+
+    def dump_bytecode(self, bucket):
+        try:
+            try:
+                super().dump_bytecode(bucket)
+            except FileNotFoundError:
+                os.makedirs(self.directory, exist_ok=True)
+                super().dump_bytecode(bucket)
+        except OSError as e:
+            logger.warning("Could not write template bytecode to %s: %s",
+                           self.directory, e)
+
+
+def precompile_templates(app):
+    """Compile every template into the bytecode and in-memory caches.
+
+    Returns the number of templates compiled. Templates that fail to compile
+    are logged and skipped: they fail the same way on first render.
+    """
+    env = app.jinja_env
+    compiled = 0
+    for name in env.list_templates(extensions=('html', 'xml', 'txt')):
+        try:
+            env.get_template(name)
+        except TemplateError as e:
+            logger.error("Template %s failed to compile: %s", name, e)
+            continue
+        compiled += 1
+    return compiled
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+import pytest
+
+# Приложение читает настройки из окружения при импорте app
+_tmp = tempfile.mkdtemp(prefix='blog-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault('CONTENT_VERSION_DIR', os.path.join(_tmp, 'versions'))
+os.environ.setdefault('SLUG_FILTER_DIR', os.path.join(_tmp, 'slug_filter'))
+os.environ.setdefault('TEMPLATE_BYTECODE_DIR', os.path.join(_tmp, 'jinja_bytecode'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(_tmp, 'profiles'))
+os.environ.setdefault('CACHE_WARM_ENABLED', '0')
+os.environ.setdefault('RATE_LIMIT_SHM_PATH', os.path.join(_tmp, 'limiter'))
+
+from main import app as flask_app  # noqa: E402
+from app import cache, db  # noqa: E402
+from models import Article, Category, Tag, User  # noqa: E402
+import page_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='admin', email='admin@example.com',
+                    password_hash='x', is_admin=True)
+        category = Category(name='Python')
+        tag = Tag(name='web')
+        db.session.add_all([user, category, tag])
+        db.session.flush()
+        for i in range(12):
+            article = Article(title=f'Article {i} about python',
+                              content=f'Content {i}',
+                              summary=f'Summary {i}',
+                              published=True,
+                              user_id=user.id,
+                              category_id=category.id)
+            article.tags = [tag]
+            db.session.add(article)
+        db.session.commit()
+        cache.clear()
+        page_cache.reset()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def lagging_replica(app, monkeypatch):
+    """Freeze a copy of the database and route replica reads to it."""
+    import sqlite3
+
+    from sqlalchemy import create_engine
+
+    import db_routing
+
+    with app.app_context():
+        primary_path = db.engine.url.database
+    path = os.path.join(_tmp, 'replica.db')
+    source, target = sqlite3.connect(primary_path), sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.close()
+    engine = create_engine(f'sqlite:///{path}')
+    monkeypatch.setattr(db_routing.router, 'pick', lambda db: engine)
+    monkeypatch.setattr(db_routing.router, 'wrote_recently', lambda: False)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,37 @@
+import pytest
+
+from app import db
+from models import Article, Tag, User
+
+
+@pytest.fixture
+def admin_client(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', False)
+    with app.app_context():
+        user_id = User.query.filter_by(is_admin=True).first().id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.mark.parametrize('action', ['add_tag', 'remove_tag'])
+def test_tag_actions_report_changed_rows(app, admin_client, action):
+    with app.app_context():
+        tag = Tag(name='perf')
+        db.session.add(tag)
+        db.session.flush()
+        articles = Article.query.order_by(Article.id).limit(4).all()
+        # Половина статей уже с тегом: меняются только две
+        articles[0].tags.append(tag)
+        articles[1].tags.append(tag)
+        db.session.commit()
+        ids, tag_id = [str(a.id) for a in articles], tag.id
+    response = admin_client.post('/admin/articles/bulk',
+                                 data={
+                                     'action': action,
+                                     'article_ids': ids,
+                                     'tag_id': tag_id
+                                 },
+                                 follow_redirects=True)
+    assert b'2 article(s)' in response.data
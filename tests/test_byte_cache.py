@@ -0,0 +1,24 @@
+from unittest import mock
+
+from byte_cache import ByteLRUCache
+
+
+def test_expired_entries_are_freed_before_lru_victims():
+    cache = ByteLRUCache(max_bytes=1000, max_entry_bytes=1000)
+    with mock.patch('byte_cache.time', return_value=100.0):
+        cache.set('old', 'x' * 10)
+        cache.set('short', 'x' * 10, timeout=5)
+        cache.set('mid', 'x' * 10)
+    with mock.patch('byte_cache.time', return_value=200.0):
+        cache.set('big', 'x' * 100)
+        assert cache.has('old') and cache.has('mid') and cache.has('big')
+        assert not cache.has('short')
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['evictions'] == 0
+
+
+def test_expiry_heap_stays_bounded_under_overwrites():
+    cache = ByteLRUCache(max_bytes=10**6)
+    for i in range(10000):
+        cache.set(f'k{i % 10}', i)
+    assert len(cache._expiry) <= 2 * len(cache._cache) + 65
@@ -0,0 +1,18 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import Article
+import content_api
+
+
+def test_article_edited_between_queries_is_not_dropped(app):
+    with app.test_request_context('/api/v1/articles'):
+        rows = db.session.execute(
+            db.select(Article.id, Article.updated_at).order_by(
+                Article.id).limit(3)).all()
+        # Правка после выборки id: updated_at уже не совпадает со строкой
+        article = db.session.get(Article, rows[1].id)
+        article.updated_at = datetime.utcnow() + timedelta(minutes=1)
+        db.session.commit()
+        payloads = content_api._article_payloads(rows, ('id', 'title'), ())
+    assert len(payloads) == 3
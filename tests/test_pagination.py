@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', [
+    '/',
+    '/category/python',
+    '/tag/web',
+    '/search?q=python',
+])
+def test_second_page(client, path):
+    join = '&' if '?' in path else '?'
+    first = client.get(path)
+    second = client.get(f'{path}{join}page=2')
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.data != second.data
+    # Ответ второй страницы из кэша тот же, что и при рендере
+    assert client.get(f'{path}{join}page=2').data == second.data
+
+
+def test_pagination_links_keep_only_whitelisted_params(client):
+    html = client.get('/search?q=%20PYTHON&utm_source=x&page=2').get_data(
+        as_text=True)
+    assert 'href="/search?q=python"' in html
+    assert 'href="/search?q=python&amp;page=3"' in html
+    assert 'utm_source' not in html
+
+
+def test_junk_params_share_the_cached_page(client):
+    assert client.get('/tag/web?utm_source=x').data == client.get(
+        '/tag/web').data
+
+
+@pytest.mark.parametrize('query', ['?page=1', '?page=abc'])
+def test_first_page_variants_keep_the_hero(client, query):
+    # Эти адреса делят ключ кэша с "/", и первый из них рендерит его для всех
+    client.get(f'/{query}')
+    assert b'display-5 fw-bold' in client.get('/').data
+
+
+def test_variant_tracking_is_bounded(app, monkeypatch):
+    import page_cache
+    monkeypatch.setattr(page_cache, 'MAX_TRACKED_PATHS', 3)
+    for i in range(10):
+        assert page_cache._admit(f'/tag/t{i}', 'page=2', 60, 5)
+    assert list(page_cache._variants) == ['/tag/t7', '/tag/t8', '/tag/t9']
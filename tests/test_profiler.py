@@ -0,0 +1,20 @@
+import pytest
+
+import profiler
+
+
+@pytest.mark.parametrize('path, template', [('/', 'index.html'),
+                                            ('/category/python',
+                                             'category.html')])
+def test_profiled_request_bypasses_page_cache(app, client, path, template):
+    assert client.get(path).status_code == 200  # страница уже в кэше
+    with app.app_context():
+        token = profiler.make_token()
+    response = client.get(path, headers={profiler.TOKEN_HEADER: token})
+    assert response.status_code == 200
+    with app.app_context():
+        profile = profiler.load(response.headers[profiler.ID_HEADER])
+    # Частичные шаблоны дыр рендерятся и при попадании в кэш, сама страница — нет
+    assert template in [t['name'] for t in profile['templates']]
+    # Профилируемый ответ не подменяет закэшированный
+    assert profiler.ID_HEADER not in client.get(path).headers
@@ -0,0 +1,42 @@
+"""Данные, кэшируемые под версией контента, не читаются с отставшей реплики."""
+
+import pytest
+
+from app import db
+from models import Article, User
+import versions
+
+
+@pytest.fixture
+def published_after_replica(app, lagging_replica):
+    with app.app_context():
+        article = Article(title='Fresh on primary only',
+                          content='Brand new content',
+                          summary='Fresh summary',
+                          published=True,
+                          user_id=User.query.first().id)
+        db.session.add(article)
+        db.session.commit()
+        versions.bump(versions.CONTENT)
+        return article.slug
+
+
+def test_read_model_rebuilds_from_primary(app, client, monkeypatch,
+                                          published_after_replica):
+    import read_model
+    monkeypatch.setitem(app.config, 'READ_MODEL_ENABLED', True)
+    monkeypatch.setattr(read_model, '_current', None)
+    assert b'Fresh on primary only' in client.get('/').data
+    assert read_model._current.articles_by_slug.get(published_after_replica)
+
+
+def test_feed_builds_from_primary(client, published_after_replica):
+    assert b'Fresh on primary only' in client.get('/feed.atom').data
+
+
+def test_suggestions_load_from_primary(client, published_after_replica):
+    labels = [
+        s['label']
+        for s in client.get('/search/suggest?q=fresh').get_json()['suggestions']
+    ]
+    assert 'Fresh on primary only' in labels
@@ -0,0 +1,26 @@
+import uuid
+
+
+def _client(app):
+    # Свой адрес на тест: файл бакетов общий для всех тестов прогона
+    address = f'10.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}.1'
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = address
+    return client
+
+
+def test_cached_search_is_not_throttled(app):
+    client = _client(app)
+    statuses = {client.get('/search?q=python').status_code for _ in range(30)}
+    assert statuses == {200}
+
+
+def test_uncached_searches_are_throttled_and_not_cached(app):
+    client = _client(app)
+    statuses = [
+        client.get(f'/search?q=python{i}').status_code for i in range(30)
+    ]
+    assert 429 in statuses
+    throttled = statuses.index(429)
+    # Отказ не попал в кэш: другой клиент получает результаты
+    assert _client(app).get(f'/search?q=python{throttled}').status_code == 200
@@ -0,0 +1,22 @@
+import time
+
+import spelling
+import versions
+
+
+def _wait_for_index(version, timeout=5):
+    deadline = time.monotonic() + timeout
+    while spelling._current._version != version:
+        assert time.monotonic() < deadline, 'spelling index was not rebuilt'
+        time.sleep(0.01)
+
+
+def test_index_is_rebuilt_in_the_background(app):
+    with app.test_request_context('/search?q=pythn'):
+        versions.bump(versions.CONTENT)
+        version = versions.get_version(versions.CONTENT)
+        previous = spelling._current._index
+        # Запрос, заметивший новую версию, получает прежний индекс сразу
+        assert spelling._current.get() is previous
+        _wait_for_index(version)
+        assert spelling.suggest_correction('pythn') == 'python'
@@ -1,8 +1,10 @@
 import os
 from datetime import datetime
 from flask import url_for, request
-from app import app, db
+from app import app, db, cache
 from models import Article, Category, Tag
+import versions
+from db_routing import use_replica
 
 def extract_excerpt(html_content, length=150):
     """Extract a plain text excerpt from HTML content."""
@@ -43,17 +45,47 @@ def extract_meta_keywords(content, max_keywords=10):
     
     return ', '.join(keywords)
 
+def invalidate_content(*deps):
+    """Drop cached pages and rebuild the sitemap after a content change.
+
+    Call it once per request, after the commit, no matter how many rows the
+    request touched. ``deps`` names the fragment dependencies that changed
+    ("categories", "tags"); only fragments keyed on them are re-rendered.
+    The global ``versions.CONTENT`` stamp is advanced on every call, and
+    the most important pages are re-rendered in the background.
+    """
+    from cache_warmer import warm_in_background
+    import page_cache
+
+    versions.bump(versions.CONTENT, *deps)
+    cache.clear()
+    page_cache.reset()
+    generate_sitemap()
+    warm_in_background()
+
+def _write_sitemap(xml_content):
+    # Атомарная замена: воркеры, отдающие sitemap из памяти (crawler_files),
+    # никогда не прочитают недописанный файл
+    import crawler_files
+
+    path = os.path.join(app.static_folder, 'sitemap.xml')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(xml_content)
+    os.replace(tmp_path, path)
+    crawler_files.sitemap.reset()
+
 def generate_sitemap():
     """Generate sitemap.xml file with enhanced SEO metadata."""
     import logging
     
     try:
         logging.info("Starting enhanced sitemap generation")
-        with app.app_context():
+        with app.app_context(), use_replica():
             # Get the base URL from environment variables or default to localhost
             base_url = os.environ.get('SITE_URL', 'http://localhost:5000')
             base_url = base_url.rstrip('/')
-            logging.info(f"Using base URL: {base_url} for sitemap")
+            logging.info("Using base URL: %s for sitemap", base_url)
             
             # Create sitemap with enhanced schema support
             xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
@@ -147,21 +179,19 @@ def generate_sitemap():
             
             # Write to file
             logging.info("Writing enhanced sitemap to file")
-            with open('static/sitemap.xml', 'w') as f:
-                f.write(xml_content)
+            _write_sitemap(xml_content)
             
             logging.info("Enhanced sitemap generation completed successfully")
             return True
     except Exception as e:
-        logging.error(f"Error generating sitemap: {str(e)}")
+        logging.error("Error generating sitemap: %s", e)
         # Create a basic sitemap to avoid errors
         basic_xml = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
         basic_xml += f'  <url>\n    <loc>{os.environ.get("SITE_URL", "http://localhost:5000")}/</loc>\n    <changefreq>daily</changefreq>\n    <priority>1.0</priority>\n  </url>\n'
         basic_xml += '</urlset>'
         
         try:
-            with open('static/sitemap.xml', 'w') as f:
-                f.write(basic_xml)
+            _write_sitemap(basic_xml)
         except:
             pass
             
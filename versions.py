@@ -0,0 +1,49 @@
+"""
+Штампы версий контента, общие для всех воркеров.
+
+Каждая зависимость ("categories", "tags", ...) — пустой файл в
+CONTENT_VERSION_DIR, а её версия — mtime файла в наносекундах. Чтение стоит
+одного stat(), поэтому версию можно проверять на каждый запрос, и изменение,
+сделанное в одном воркере, сразу видно остальным (в отличие от SimpleCache,
+который у каждого воркера свой).
+"""
+
+import os
+import time
+
+from flask import current_app
+
+# Общий штамп: сдвигается при любом изменении контента (см. invalidate_content)
+CONTENT = 'content'
+
+
+def _path(name):
+    return os.path.join(current_app.config['CONTENT_VERSION_DIR'], name)
+
+
+def get_version(name):
+    """Return the current version stamp of ``name`` (0 if never bumped)."""
+    try:
+        return os.stat(_path(name)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def version_key(*names):
+    """Combine the versions of ``names`` into one cache-key component."""
+    return '.'.join(str(get_version(name)) for name in names)
+
+
+def bump(*names):
+    """Advance the version stamps of ``names``."""
+    for name in names:
+        path = _path(name)
+        previous = get_version(name)
+        try:
+            open(path, 'a').close()
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'a').close()
+        # Версия строго растёт, даже если часы не сдвинулись с прошлого bump
+        stamp = max(time.time_ns(), previous + 1)
+        os.utime(path, ns=(stamp, stamp))